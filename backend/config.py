@@ -1,59 +1,126 @@
 import os
+import re
 import sys
+from dataclasses import dataclass
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def _parse_origins(raw: str) -> Tuple[Tuple[str, ...], Optional[str]]:
+    """
+    Split ALLOWED_ORIGINS into exact origins and one regex for wildcard entries.
+    CORSMiddleware only matches entries like "https://*.vercel.app" through allow_origin_regex.
+    """
+    exact, patterns = [], []
+    for origin in (o.strip() for o in raw.split(",")):
+        if not origin:
+            continue
+        if origin != "*" and "*" in origin:
+            patterns.append(".*".join(re.escape(part) for part in origin.split("*")))
+        else:
+            exact.append(origin)
+    # Optional operator-supplied pattern; nothing is allowed by regex unless configured
+    extra = os.getenv("ALLOWED_ORIGIN_REGEX", "")
+    if extra:
+        patterns.append(extra)
+    return tuple(exact), "|".join(f"(?:{p})" for p in patterns) or None
+
+_ORIGINS, _ORIGIN_REGEX = _parse_origins(os.getenv("ALLOWED_ORIGINS", "*"))
+
+@dataclass(frozen=True, slots=True)
 class Settings:
+    # All env parsing happens once, at import; instances are immutable
+
     # API Configuration
-    API_HOST = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT = os.getenv("API_PORT", "8000")
-    ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
-    
+    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT: str = os.getenv("API_PORT", "8000")
+    ALLOWED_ORIGINS: Tuple[str, ...] = _ORIGINS
+    ALLOWED_ORIGIN_REGEX: Optional[str] = _ORIGIN_REGEX
+
     # Interview Configuration
-    DEFAULT_QUESTION_COUNT = int(os.getenv("DEFAULT_QUESTION_COUNT", "5"))
-    CLOSING_BUFFER_SECONDS = int(os.getenv("CLOSING_BUFFER_SECONDS", "30"))
-    
+    DEFAULT_QUESTION_COUNT: int = int(os.getenv("DEFAULT_QUESTION_COUNT", "5"))
+    CLOSING_BUFFER_SECONDS: int = int(os.getenv("CLOSING_BUFFER_SECONDS", "30"))
+
     # Media Paths
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    MEDIA_DIR = os.getenv("MEDIA_DIR", os.path.join(BASE_DIR, "media"))
-    AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(MEDIA_DIR, "audio"))
-    VIDEO_CACHE_DIR = os.getenv("VIDEO_CACHE_DIR", os.path.join(MEDIA_DIR, "video"))
-    AVATAR_DIR = os.getenv("AVATAR_DIR", os.path.join(MEDIA_DIR, "avatars"))
-
-    # Ensure directories exist on startup
-    os.makedirs(MEDIA_DIR, exist_ok=True)
-    os.makedirs(VIDEO_CACHE_DIR, exist_ok=True)
-    os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
-    os.makedirs(AVATAR_DIR, exist_ok=True)
-    
+    BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    MEDIA_DIR: str = os.getenv("MEDIA_DIR", os.path.join(BASE_DIR, "media"))
+    AUDIO_CACHE_DIR: str = os.getenv("AUDIO_CACHE_DIR", os.path.join(MEDIA_DIR, "audio"))
+    VIDEO_CACHE_DIR: str = os.getenv("VIDEO_CACHE_DIR", os.path.join(MEDIA_DIR, "video"))
+    AVATAR_DIR: str = os.getenv("AVATAR_DIR", os.path.join(MEDIA_DIR, "avatars"))
+    CACHE_DIR: str = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+    # Downloaded model weights (Whisper etc.) - kept across restarts/containers
+    MODEL_CACHE_DIR: str = os.getenv("MODEL_CACHE_DIR", os.path.join(BASE_DIR, "models"))
+
+    # Shared audio/video caches are pruned (least recently used first) above this size; 0 = never
+    MEDIA_CACHE_MAX_MB: int = int(os.getenv("MEDIA_CACHE_MAX_MB", "2048"))
+    MEDIA_CACHE_PRUNE_INTERVAL_S: int = int(os.getenv("MEDIA_CACHE_PRUNE_INTERVAL_S", "3600"))
+
     # MuseTalk Configuration
-    MUSETALK_ROOT = os.getenv("MUSETALK_ROOT", os.path.join(BASE_DIR, "MuseTalk"))
-    MUSETALK_GPU = int(os.getenv("MUSETALK_GPU", "0"))
-    MUSETALK_FP16 = os.getenv("MUSETALK_FP16", "true").lower() == "true"
-    MUSETALK_PYTHON_BIN = os.getenv("MUSETALK_PYTHON_BIN", sys.executable)
+    MUSETALK_ROOT: str = os.getenv("MUSETALK_ROOT", os.path.join(BASE_DIR, "MuseTalk"))
+    MUSETALK_GPU: int = int(os.getenv("MUSETALK_GPU", "0"))
+    # Comma-separated device ids to spread renders over (one persistent worker per GPU)
+    MUSETALK_GPUS: Tuple[int, ...] = tuple(
+        int(g) for g in os.getenv("MUSETALK_GPUS", str(MUSETALK_GPU)).split(",") if g.strip()
+    )
+    MUSETALK_FP16: bool = os.getenv("MUSETALK_FP16", "true").lower() == "true"
+    MUSETALK_PYTHON_BIN: str = os.getenv("MUSETALK_PYTHON_BIN", sys.executable)
+    # Keep one inference process alive so checkpoints load once, not per clip
+    MUSETALK_PERSISTENT_WORKER: bool = os.getenv("MUSETALK_PERSISTENT_WORKER", "true").lower() == "true"
+    # Concurrent renders allowed per GPU (one-shot mode; each persistent worker runs jobs in turn)
+    MUSETALK_MAX_CONCURRENCY: int = int(os.getenv("MUSETALK_MAX_CONCURRENCY", "1"))
+    # Reuse the avatar's saved face coordinates instead of re-running landmark detection per clip
+    MUSETALK_USE_SAVED_COORD: bool = os.getenv("MUSETALK_USE_SAVED_COORD", "true").lower() == "true"
 
-    MUSEV_ROOT = os.getenv("MUSEV_ROOT", os.path.join(BASE_DIR, "MuseV"))
+    MUSEV_ROOT: str = os.getenv("MUSEV_ROOT", os.path.join(BASE_DIR, "MuseV"))
     # Base video filename to store/reuse
-    BASE_VIDEO_NAME = "base_listening_loop.mp4"
-    
+    BASE_VIDEO_NAME: str = "base_listening_loop.mp4"
+
     # Piper TTS Configuration
-    PIPER_VOICE = os.getenv("PIPER_VOICE","en_US-bryce-medium")
-    PIPER_SPEED = float(os.getenv("PIPER_SPEED", "1.0"))
+    PIPER_VOICE: str = os.getenv("PIPER_VOICE","en_US-bryce-medium")
+    PIPER_SPEED: float = float(os.getenv("PIPER_SPEED", "1.0"))
+    # In-process syntheses allowed to run at once (each already uses all CPU cores)
+    PIPER_MAX_CONCURRENCY: int = int(os.getenv("PIPER_MAX_CONCURRENCY", "1"))
     # Windows: Full path to piper executable (e.g., C:\Program Files\piper\piper.exe)
     # Linux/Mac: Just "piper" if installed globally
-    PIPER_BIN = os.getenv("PIPER_BIN", os.path.join(BASE_DIR, "venv", "Scripts", "piper.exe")
-)
-    
+    PIPER_BIN: str = os.getenv("PIPER_BIN", os.path.join(BASE_DIR, "venv", "Scripts", "piper.exe"))
+
     # OpenAI Whisper Configuration
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-    WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
-    
+    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "base")
+    # CTranslate2 weight precision: "auto" = float16 on GPU, int8 on CPU (or e.g. int8_float16, float32)
+    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "auto").lower()
+    # CPU decode threads (0 = all cores)
+    WHISPER_CPU_THREADS: int = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+    # Concurrent transcriptions arriving within the window are decoded as one batch
+    WHISPER_BATCH_SIZE: int = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+    WHISPER_BATCH_WINDOW_MS: int = int(os.getenv("WHISPER_BATCH_WINDOW_MS", "20"))
+    # New audio needed before another live (partial) transcription pass
+    WHISPER_STREAM_MIN_CHUNK_SECONDS: float = float(os.getenv("WHISPER_STREAM_MIN_CHUNK_SECONDS", "1.0"))
+
     # HuggingFace Configuration
-    HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")
-    HUGGINGFACE_MODEL = os.getenv("HUGGINGFACE_MODEL", "mistral-7b-instruct")
-    
+    HUGGINGFACE_API_KEY: str = os.getenv("HUGGINGFACE_API_KEY", "")
+    HUGGINGFACE_MODEL: str = os.getenv("HUGGINGFACE_MODEL", "mistral-7b-instruct")
+    HF_MAX_CONCURRENCY: int = int(os.getenv("HF_MAX_CONCURRENCY", "10"))
+
+    # Semantic Cache Configuration (skips repeat LLM calls for near-identical prompts)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.87"))
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    # "onnx" = int8-quantized ONNX Runtime export (no torch), "torch" = sentence-transformers
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "onnx").lower()
+    EMBEDDING_ONNX_FILE: str = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+
     #Mount frontend
-    FRONTEND_DIR = os.path.join(BASE_DIR, "frontend", "dist")
+    FRONTEND_DIR: str = os.path.join(BASE_DIR, "frontend", "dist")
+
+    def __post_init__(self):
+        # Ensure directories exist on startup
+        os.makedirs(self.MEDIA_DIR, exist_ok=True)
+        os.makedirs(self.VIDEO_CACHE_DIR, exist_ok=True)
+        os.makedirs(self.AUDIO_CACHE_DIR, exist_ok=True)
+        os.makedirs(self.AVATAR_DIR, exist_ok=True)
+        os.makedirs(self.CACHE_DIR, exist_ok=True)
+        os.makedirs(self.MODEL_CACHE_DIR, exist_ok=True)
 
 settings = Settings()
@@ -1,18 +1,33 @@
 import asyncio
-import subprocess
 import os
-from typing import Optional, List, Union
+from typing import Callable, Optional, List, Union, Dict, Tuple
 import logging
 from pathlib import Path
 import shutil
+import stat
+import wave
+import weakref
 from config import settings
 import tempfile 
+import threading
 import yaml
+import aiofiles
 import re
+import orjson
+import hashlib
+import io
+import json
+import struct
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from cachetools import TTLCache
+import numpy as np
+import soundfile as sf
 from huggingface_hub import InferenceClient
 
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
+# Handlers/levels are configured by the application (main.py), not by this module
 logger = logging.getLogger(__name__)
 
 # ===== MUSETALK API - ACTUAL VIDEO GENERATION =====
@@ -26,25 +41,24 @@ class MuseVAPI:
         self.gpu = settings.MUSETALK_GPU
         self.lock = asyncio.Lock()
         
-        logger.info(f"✓ MuseV initialized: {self.root}")
+        logger.info("✓ MuseV initialized: %s", self.root)
 
     async def generate_base_video(self, image_path: str, output_path: str) -> Optional[str]:
         """
         Generate a 30-second idle video from a static image.
         """
         async with self.lock:
-            if os.path.exists(output_path):
-                logger.info(f"[MuseV] Base video already exists: {output_path}")
+            if await asyncio.to_thread(os.path.exists, output_path):
+                logger.info("[MuseV] Base video already exists: %s", output_path)
                 return output_path
 
-            logger.info(f"[MuseV] Generating new base video (This takes time!)...")
+            logger.info("[MuseV] Generating new base video (This takes time!)...")
             
             try:
                 # MuseV requires absolute paths
                 root_abs = os.path.abspath(self.root)
                 image_abs = os.path.abspath(image_path)
                 output_abs = os.path.abspath(output_path)
-                os.makedirs(os.path.dirname(output_abs), exist_ok=True)
 
                 # Construct MuseV Command
                 # NOTE: Adjust arguments based on your specific MuseV version/script
@@ -61,88 +75,381 @@ class MuseVAPI:
                 env = os.environ.copy()
                 env["PYTHONPATH"] = root_abs + os.pathsep + env.get("PYTHONPATH", "")
 
-                logger.info(f"[MuseV] Running: {' '.join(cmd)}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("[MuseV] Running: %s", ' '.join(cmd))
                 
-                # Run Inference
-                result = await asyncio.to_thread(
-                    subprocess.run,
-                    cmd,
+                # Run Inference (native async subprocess - no executor thread parked for 20 minutes)
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
                     cwd=root_abs,
                     env=env,
-                    capture_output=True,
-                    text=True,
-                    timeout=1200 # Give it 20 mins, MuseV is heavy
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE
                 )
+                try:
+                    # Only the stderr tail is kept (for the error log), not 20 minutes of progress output
+                    stderr, _ = await asyncio.wait_for(
+                        asyncio.gather(_read_tail(proc.stderr), proc.wait()),
+                        timeout=1200 # Give it 20 mins, MuseV is heavy
+                    )
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    logger.error("[MuseV] Timed out after 1200s")
+                    return None
 
-                if result.returncode != 0:
-                    logger.error(f"[MuseV] Failed: {result.stderr[-1000:]}")
+                if proc.returncode != 0:
+                    logger.error("[MuseV] Failed: %s", stderr.decode('utf-8', errors='replace')[-1000:])
                     return None
 
                 # MuseV often outputs to a folder, so we might need to find the specific mp4
                 # Assuming output_abs is the exact file path for this example:
-                if os.path.exists(output_abs):
-                    logger.info(f"✓ [MuseV] Generated base video: {output_path}")
+                if await asyncio.to_thread(os.path.exists, output_abs):
+                    logger.info("✓ [MuseV] Generated base video: %s", output_path)
                     return output_path
                 else:
-                    logger.error(f"[MuseV] Output file not found after success code.")
+                    logger.error("[MuseV] Output file not found after success code.")
                     return None
 
             except Exception as e:
-                logger.error(f"[MuseV] Error: {e}", exc_info=True)
+                logger.error("[MuseV] Error: %s", e, exc_info=True)
                 return None
 
 
+# ===== FILE CACHE HELPERS =====
+
+# Small dedicated pool for stat-style probes, so slow volumes never stall the event loop
+# (and never queue behind long jobs in the default executor)
+_FS_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fs-probe")
+
+# Health polls land every few seconds - answer repeats from memory for a short while
+_FS_PROBE_CACHE: TTLCache = TTLCache(maxsize=64, ttl=5.0)
+
+async def _fs_probe(*probes: Tuple[Callable[[str], bool], str]) -> List[bool]:
+    """
+    Run (os.path.isfile | os.path.isdir, path) checks concurrently, off the event loop.
+    Each is a single stat(); results are reused for 5s.
+    """
+    results = _FS_PROBE_CACHE.get(probes)
+    if results is None:
+        loop = asyncio.get_running_loop()
+        results = _FS_PROBE_CACHE[probes] = list(
+            await asyncio.gather(*(loop.run_in_executor(_FS_POOL, check, path) for check, path in probes))
+        )
+    return results
+
+async def _read_tail(stream: asyncio.StreamReader, max_bytes: int = 8192) -> bytes:
+    """Drain a child's pipe as it's written, keeping only the last max_bytes for error logs"""
+    tail = bytearray()
+    while chunk := await stream.read(65536):
+        tail += chunk
+        if len(tail) > max_bytes:
+            del tail[:-max_bytes]
+    return bytes(tail)
+
+def _file_sha1(path: str) -> str:
+    """sha1 of a file's contents, read in 1MB blocks"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _regular_file_size(path: str) -> Optional[int]:
+    """Size of a regular file from a single stat() call, or None if it's missing / not a file"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size if stat.S_ISREG(st.st_mode) else None
+
+def _write_buffers(path: str, *buffers, zero_fill_to: Optional[int] = None) -> int:
+    """
+    Write buffers straight to a file descriptor (no Python-level buffering or copies).
+    The final size is preallocated where the OS supports it so the file isn't grown write-by-write.
+    zero_fill_to extends the file with zeros via ftruncate instead (sparse where supported,
+    and no zero bytes are ever materialized in Python).
+    """
+    total = sum(len(b) for b in buffers)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        if total and zero_fill_to is None and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, total)
+            except OSError:
+                pass  # Filesystem doesn't support preallocation - plain writes still work
+        for buffer in buffers:
+            view = memoryview(buffer)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        if zero_fill_to is not None and zero_fill_to > total:
+            os.ftruncate(fd, zero_fill_to)
+            total = zero_fill_to
+    finally:
+        os.close(fd)
+    return total
+
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+def _wav_header(num_samples: int, sample_rate: int = 22050) -> bytes:
+    """44-byte header for a mono 16-bit PCM WAV, packed in one C-level call."""
+    data_size = num_samples * 2
+    return _WAV_HEADER.pack(
+        b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, 1,
+        sample_rate, sample_rate * 2, 2, 16, b"data", data_size
+    )
+
+def _place_link(src: str, dst: str):
+    try:
+        os.remove(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def _link_or_copy(src: str, dst: str):
+    """
+    Hardlink src to dst (no data copy), falling back to a copy across filesystems.
+    dst's folder is assumed to exist and only created when the first attempt says otherwise.
+    """
+    try:
+        _place_link(src, dst)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        _place_link(src, dst)
+
+def prune_media_cache(max_bytes: int) -> int:
+    """
+    Evict least-recently-used shared cache files (TTS lines, silence clips, rendered videos)
+    until AUDIO_CACHE_DIR + VIDEO_CACHE_DIR fit in max_bytes. Returns bytes freed.
+    Only top-level files are touched - session folders under both caches hold hardlinks
+    and are removed per session by MediaService.cleanup_old_videos().
+    """
+    entries, total = [], 0
+    for directory in (settings.AUDIO_CACHE_DIR, settings.VIDEO_CACHE_DIR):
+        with os.scandir(directory) as it:
+            for entry in it:
+                # tmp* = syntheses still being written
+                if entry.name.startswith("tmp") or not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                entries.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+                total += st.st_size
+    freed = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total - freed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            pass
+    return freed
+
+@lru_cache(maxsize=1)
+def _has_cuda() -> bool:
+    """Whether a CUDA device is visible - probed once (via ctranslate2, which faster-whisper ships; no torch import)"""
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+@lru_cache(maxsize=8)
+def _locate_inference_script(musetalk_root: str) -> Optional[str]:
+    """MuseTalk's inference.py under the configured root - probed once per process"""
+    search_locations = (
+        os.path.join(musetalk_root, "MuseTalk", "scripts", "inference.py"),
+        os.path.join(musetalk_root, "scripts", "inference.py"),
+        os.path.join(musetalk_root, "inference.py"),
+        "inference.py"
+    )
+    found = next((path for path in search_locations if os.path.exists(path)), None)
+    return os.path.abspath(found) if found else None
+
+@lru_cache(maxsize=8)
+def _resolve_executable(configured: str, name: str) -> Optional[str]:
+    """Configured path if it exists, else a PATH lookup - resolved once per process"""
+    if configured and os.path.exists(configured):
+        return configured
+    # Same PATH (+PATHEXT on Windows) search as which/where, without spawning them
+    return shutil.which(name)
+
 # [UPDATED] ===== MUSETALK API =====
 
 class MuseTalkAPI:
-    # ... __init__ remains same ...
+    # Rounded duration -> silent WAV in AUDIO_CACHE_DIR, shared by all listening turns
+    _silence_cache: Dict[float, str] = {}
+
     def __init__(self):
         self.musetalk_root = settings.MUSETALK_ROOT
+        self.musetalk_abs = os.path.abspath(self.musetalk_root)
         self.gpu = settings.MUSETALK_GPU
-        self.fp16 = settings.MUSETALK_FP16
+        # Half precision only means something on a GPU
+        self.fp16 = settings.MUSETALK_FP16 and _has_cuda()
         self.python_bin = settings.MUSETALK_PYTHON_BIN
         self.inference_script = self._find_inference_script()
-        self.lock = asyncio.Lock()
+        if not self.inference_script:
+            logger.warning("[MuseTalk] inference.py not found under %s", self.musetalk_root)
+            # Directory listing is diagnostics only - skip the scandir unless someone asked for it
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    with os.scandir(self.musetalk_root) as it:
+                        logger.debug("[MuseTalk] %s contains: %s", self.musetalk_root, sorted(e.name for e in it))
+                except OSError as e:
+                    logger.debug("[MuseTalk] Cannot list %s: %s", self.musetalk_root, e)
+        self.gpus = settings.MUSETALK_GPUS or (self.gpu,)
+        self._static_args = self._build_static_args()
+        # Bundled ffmpeg (Windows builds) is probed once, not per spawned process
+        self._ffmpeg_dir, self._ffmpeg_exe = self._get_ffmpeg_path()
+        self._source_digests: Dict[tuple, str] = {}
+        self.worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "musetalk_worker.py")
+        # Ships with the backend - checked once rather than on every render
+        self.has_worker_script = os.path.exists(self.worker_script)
+        self.use_worker = settings.MUSETALK_PERSISTENT_WORKER and self.has_worker_script
+        self._workers: Dict[int, asyncio.subprocess.Process] = {}
+        # cache_path -> future resolved (True = rendered and cached) when that render finishes
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Each render holds GB of GPU memory - renders check out a GPU slot first.
+        # A persistent worker is one process on one pipe pair, so it gets exactly one slot
+        # (single writer, jobs never interleave); one-shot processes get MAX_CONCURRENCY each.
+        slots_per_gpu = 1 if self.use_worker else max(1, settings.MUSETALK_MAX_CONCURRENCY)
+        self._gpu_slots: asyncio.Queue = asyncio.Queue()
+        for _ in range(slots_per_gpu):
+            for gpu in self.gpus:
+                self._gpu_slots.put_nowait(gpu)
         
-        logger.info(f"✓ MuseTalk initialized")
+        logger.info("✓ MuseTalk initialized")
+
+    def _build_static_args(self) -> Tuple[str, ...]:
+        """Inference flags that never change between clips - model paths and feature switches"""
+        models_dir = os.path.join(self.musetalk_abs, "models")
+        args = (
+            "--unet_config", os.path.join(models_dir, "musetalkV15", "musetalk.json").replace("\\", "/"),
+            "--unet_model_path", os.path.join(models_dir, "musetalkV15", "unet.pth").replace("\\", "/"),
+            "--whisper_dir", os.path.join(models_dir, "whisper").replace("\\", "/"),
+        )
+        if self.fp16:
+            args += ("--use_float16",)
+        if settings.MUSETALK_USE_SAVED_COORD:
+            # Every clip reuses the same avatar/base video - detect its face landmarks once;
+            # MuseTalk pickles them next to its results and reloads them on later runs
+            args += ("--use_saved_coord",)
+        return args
 
-    # ... _find_inference_script and _get_ffmpeg_path remain same ...
     def _find_inference_script(self) -> Optional[str]:
-        search_locations = [
-            os.path.join(self.musetalk_root, "scripts", "inference.py"),
-            os.path.join(self.musetalk_root, "inference.py"),
-            os.path.abspath("inference.py")
-        ]
-        for path in search_locations:
-            if os.path.exists(path): return os.path.abspath(path)
-        return None
+        return _locate_inference_script(self.musetalk_root)
 
     def _get_ffmpeg_path(self):
-        musetalk_abs = os.path.abspath(self.musetalk_root)
-        ffmpeg_dir = os.path.join(musetalk_abs, "ffmpeg", "bin")
+        ffmpeg_dir = os.path.join(self.musetalk_abs, "ffmpeg", "bin")
         ffmpeg_exe = os.path.join(ffmpeg_dir, "ffmpeg.exe")
         if os.path.exists(ffmpeg_exe): return ffmpeg_dir, ffmpeg_exe
         return None, None
 
+    def _source_digest(self, path: str) -> str:
+        """Digest of the avatar/base video, memoized by (path, mtime, size) since every clip reuses it"""
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = self._source_digests.get(memo_key)
+        if digest is None:
+            digest = _file_sha1(path)
+            self._source_digests[memo_key] = digest
+        return digest
+
+    def _video_cache_path(self, source_digest: str, audio_path: str) -> Optional[str]:
+        """Content-addressed cache entry for (source, audio, precision)"""
+        try:
+            key_material = f"{source_digest}|{_file_sha1(audio_path)}|{'fp16' if self.fp16 else 'fp32'}"
+        except OSError:
+            return None
+        key = hashlib.sha1(key_material.encode("utf-8")).hexdigest()
+        return os.path.join(settings.VIDEO_CACHE_DIR, f"{key}.mp4")
+
+    def _lookup_cache(self, input_source: str, audio_path: str, output_path: str) -> Tuple[bool, Optional[str], bool]:
+        """
+        Input check + cache lookup (+ link on a hit) as one blocking call, run via to_thread.
+        Returns (input_exists, cache_path, served_from_cache).
+        """
+        # The digest's stat doubles as the existence check
+        try:
+            source_digest = self._source_digest(input_source)
+        except OSError:
+            return False, None, False
+        cache_path = self._video_cache_path(source_digest, audio_path)
+        if cache_path:
+            # Just try the link - a missing entry is the miss, no separate exists() probe
+            try:
+                _place_link(cache_path, output_path)
+                return True, cache_path, True
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("[MuseTalk] Cache link failed, regenerating: %s", e)
+        return True, cache_path, False
+
     async def generate(
         self,
         input_source: str,  # CHANGED NAME: Can be Image (.png) OR Video (.mp4)
         audio_path: str,
-        output_path: str
+        output_path: str,
+        use_cache: bool = True
     ) -> Optional[str]:
         """
         Generate lip-synced video using MuseTalk.
         input_source: Path to 'base_listening.mp4' (video) OR 'avatar.png' (image)
+        Repeated (source, audio) pairs - canned greeting/closing lines - are linked from the video cache.
+        use_cache=False always renders (and stores nothing).
         """
-        async with self.lock:
+        if use_cache:
+            input_ok, cache_path, hit = await asyncio.to_thread(
+                self._lookup_cache, input_source, audio_path, output_path
+            )
+        else:
+            input_ok, cache_path, hit = await asyncio.to_thread(os.path.exists, input_source), None, False
+        if hit:
+            logger.info("✓ [MuseTalk] Cache hit: %s", output_path)
+            return output_path
+        if not input_ok:
+            logger.error("[MuseTalk] Input source not found: %s", input_source)
+            return None
+        
+        if not cache_path:
+            return await self._render(input_source, audio_path, output_path, cache_path)
+
+        # The same (source, audio) pair already rendering for another session - e.g. two
+        # interviews starting together on the canned greeting: wait for that one and link it
+        shared = self._inflight.get(cache_path)
+        if shared is not None:
+            if await asyncio.shield(shared):
+                try:
+                    await asyncio.to_thread(_link_or_copy, cache_path, output_path)
+                    logger.info("✓ [MuseTalk] Shared in-flight render: %s", output_path)
+                    return output_path
+                except OSError as e:
+                    logger.warning("[MuseTalk] Could not link shared render, regenerating: %s", e)
+            return await self._render(input_source, audio_path, output_path, cache_path)
+
+        done = self._inflight[cache_path] = asyncio.get_running_loop().create_future()
+        result = None
+        try:
+            result = await self._render(input_source, audio_path, output_path, cache_path)
+            return result
+        finally:
+            del self._inflight[cache_path]
+            done.set_result(result is not None)
+
+    async def _render(self, input_source: str, audio_path: str, output_path: str, cache_path: Optional[str]) -> Optional[str]:
+        """One MuseTalk render on a checked-out GPU slot; the output is stored under cache_path when given"""
+        async with self._checkout_gpu() as gpu:
             config_path = None
             try:
                 # --- 0. RESOLVE PATHS ---
-                musetalk_abs = os.path.abspath(self.musetalk_root)
-                if not os.path.exists(input_source):
-                    logger.error(f"[MuseTalk] Input source not found: {input_source}")
-                    return None
-                
                 # FORCE FORWARD SLASHES
                 input_abs = os.path.abspath(input_source).replace("\\", "/")
                 audio_abs = os.path.abspath(audio_path).replace("\\", "/")
@@ -152,17 +459,7 @@ class MuseTalkAPI:
                 input_basename = os.path.basename(input_abs)
                 input_name_no_ext = os.path.splitext(input_basename)[0]
 
-                # --- 1. SETUP FFMPEG ---
-                ffmpeg_dir, ffmpeg_exe = self._get_ffmpeg_path()
-                use_local_ffmpeg = True if ffmpeg_dir else False
-
-                # --- 2. PREPARE MODEL PATHS ---
-                unet_path = os.path.join(musetalk_abs, "models", "musetalkV15", "unet.pth")
-                musetalk_json = os.path.join(musetalk_abs, "models", "musetalkV15", "musetalk.json")
-                whisper_path = os.path.join(musetalk_abs, "models", "whisper")
-
-                # --- 3. CREATE CONFIGURATION ---
-                os.makedirs(os.path.dirname(output_abs), exist_ok=True)
+                # --- 1. CREATE CONFIGURATION ---
 
                 # [CRITICAL] Catch-all bbox_shift for both Image and Video inputs
                 bbox_shift_config = {
@@ -178,61 +475,201 @@ class MuseTalkAPI:
                     "audio_path": audio_abs,
                     "bbox_shift": bbox_shift_config, 
                     "video_out_path": output_abs,
-                    "fp16": True,
+                    "fp16": self.fp16,
                 }
 
                 with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml') as tmp_config:
                     yaml.dump(config_payload, tmp_config, default_flow_style=False)
                     config_path = tmp_config.name
 
-                logger.info(f"[MuseTalk] Generating video...")
-                logger.info(f"  Input: {input_basename}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("[MuseTalk] Generating video...")
+                    logger.info("  Input: %s", input_basename)
 
-                # --- 4. EXECUTE INFERENCE ---
-                cmd = [
-                    self.python_bin,
-                    "-m", "scripts.inference",
-                    "--inference_config", config_path.replace("\\", "/"), 
-                    "--gpu", str(self.gpu),
-                    "--unet_config", musetalk_json.replace("\\", "/"),
-                    "--unet_model_path", unet_path.replace("\\", "/"),
-                    "--whisper_dir", whisper_path.replace("\\", "/")
+                # --- 2. EXECUTE INFERENCE ---
+                args = [
+                    "--inference_config", config_path.replace("\\", "/"),
+                    "--gpu", str(gpu),
+                    *self._static_args
                 ]
 
-                env = os.environ.copy()
-                env["PYTHONPATH"] = musetalk_abs + os.pathsep + env.get("PYTHONPATH", "")
-                if use_local_ffmpeg:
-                    env["PATH"] = ffmpeg_dir + os.pathsep + env.get("PATH", "")
-
-                result = await asyncio.to_thread(
-                    subprocess.run,
-                    cmd,
-                    cwd=musetalk_abs,
-                    env=env,
-                    capture_output=True,
-                    text=True,
-                    timeout=600 
-                )
-
-                if result.returncode != 0:
-                    logger.error(f"[MuseTalk] FAILED: {result.stderr[-1000:]}")
+                if self.use_worker:
+                    # The worker already has its cwd/env - a job is just argv over the pipe
+                    ok = await self._run_worker_job(gpu, args)
+                else:
+                    env = self._subprocess_env()
+                    ok = await self._run_once(args, env, f"{os.path.splitext(output_abs)[0]}.musetalk.log")
+                if not ok:
                     return None
 
-                if not os.path.exists(output_abs):
-                    logger.error(f"[MuseTalk] Output not found: {output_abs}")
+                file_size = await asyncio.to_thread(_regular_file_size, output_abs)
+                if not file_size:
+                    logger.error("[MuseTalk] Output not found or empty: %s", output_abs)
                     return None
 
-                logger.info(f"✓ [MuseTalk] Success: {output_path}")
+                logger.info("✓ [MuseTalk] Success: %s (%d bytes)", output_path, file_size)
+                if cache_path:
+                    try:
+                        await asyncio.to_thread(_link_or_copy, output_abs, cache_path)
+                    except OSError as e:
+                        logger.warning("[MuseTalk] Could not store video in cache: %s", e)
                 return output_path
 
             except Exception as e:
-                logger.error(f"[MuseTalk] Error: {e}", exc_info=True)
+                logger.error("[MuseTalk] Error: %s", e, exc_info=True)
                 return None
             finally:
-                if config_path and os.path.exists(config_path):
+                if config_path:
                     try: os.remove(config_path)
-                    except: pass
+                    except OSError: pass
     
+    async def get_status(self) -> dict:
+        """Installation/worker state for the health endpoint (filesystem probes run off-loop)"""
+        models_dir = os.path.join(self.musetalk_abs, "models")
+        root_ok, unet_ok, whisper_ok = await _fs_probe(
+            (os.path.isdir, self.musetalk_abs),
+            (os.path.isfile, os.path.join(models_dir, "musetalkV15", "unet.pth")),
+            (os.path.isdir, os.path.join(models_dir, "whisper")),
+        )
+        return {
+            "available": root_ok and unet_ok and whisper_ok and bool(self.inference_script),
+            "root": root_ok,
+            "models": unet_ok and whisper_ok,
+            "inference_script": bool(self.inference_script),
+            "workers_running": sum(proc.returncode is None for proc in self._workers.values()),
+            "gpus": list(self.gpus),
+        }
+
+    async def _run_once(self, args: List[str], env: dict, log_path: str) -> bool:
+        """Per-call inference process (pays interpreter start + checkpoint load every clip)"""
+        # MuseTalk logs MBs of progress - send it to a file instead of buffering it in memory
+        with open(log_path, "w+b") as log_file:
+            # Native async subprocess - no executor thread parked for the whole render
+            proc = await asyncio.create_subprocess_exec(
+                self.python_bin, "-m", "scripts.inference", *args,
+                cwd=self.musetalk_abs,
+                env=env,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=log_file
+            )
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=600)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                logger.error("[MuseTalk] Timed out after 600s (log: %s)", log_path)
+                return False
+            except asyncio.CancelledError:
+                # Nobody is waiting for this clip any more - free the GPU
+                proc.kill()
+                await proc.wait()
+                raise
+
+            if proc.returncode != 0:
+                log_file.seek(max(0, log_file.seek(0, os.SEEK_END) - 4096))
+                logger.error("[MuseTalk] FAILED (log: %s): %s", log_path, log_file.read().decode('utf-8', errors='replace'))
+                return False
+
+        try: os.remove(log_path)
+        except OSError: pass
+        return True
+
+    @asynccontextmanager
+    async def _checkout_gpu(self):
+        """Hold a GPU slot for the duration of one render; waiters are served in FIFO order"""
+        gpu = await self._gpu_slots.get()
+        try:
+            yield gpu
+        finally:
+            self._gpu_slots.put_nowait(gpu)
+
+    def _subprocess_env(self) -> dict:
+        """Environment for MuseTalk processes: its root on PYTHONPATH, bundled ffmpeg first on PATH"""
+        env = os.environ.copy()
+        env["PYTHONPATH"] = self.musetalk_abs + os.pathsep + env.get("PYTHONPATH", "")
+        if self._ffmpeg_dir:
+            env["PATH"] = self._ffmpeg_dir + os.pathsep + env.get("PATH", "")
+        return env
+
+    async def _ensure_worker(self, gpu: int) -> asyncio.subprocess.Process:
+        """Start the GPU's persistent worker on first use, or again after it died"""
+        proc = self._workers.get(gpu)
+        if proc is None or proc.returncode is not None:
+            logger.info("[MuseTalk] Starting persistent worker on GPU %s", gpu)
+            env = self._subprocess_env()
+            # Worker chatter goes to a log file; stdout carries only the job protocol
+            with open(os.path.join(settings.CACHE_DIR, f"musetalk_worker_gpu{gpu}.log"), "ab") as log_file:
+                proc = self._workers[gpu] = await asyncio.create_subprocess_exec(
+                    self.python_bin, self.worker_script,
+                    cwd=self.musetalk_abs,
+                    env=env,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=log_file
+                )
+        return proc
+
+    async def _run_worker_job(self, gpu: int, args: List[str]) -> bool:
+        """
+        Send one job to the GPU's persistent worker and wait for its reply.
+        Caller holds the GPU's only slot, so this is the worker's sole writer/reader.
+        """
+        try:
+            proc = await self._ensure_worker(gpu)
+            proc.stdin.write(orjson.dumps({"argv": args}) + b"\n")
+            await proc.stdin.drain()
+            line = await asyncio.wait_for(proc.stdout.readline(), timeout=600)
+            if not line:
+                raise RuntimeError(f"worker exited with status {await proc.wait()}")
+            result = orjson.loads(line)
+        except asyncio.CancelledError:
+            # The reply to this job would be read by the next one - drop the worker mid-render
+            await self._stop_worker(self._workers.pop(gpu, None))
+            raise
+        except Exception as e:
+            # Timed out or crashed mid-job - drop it; the next call starts a fresh worker
+            logger.error("[MuseTalk] Worker on GPU %s failed, restarting on next job: %r", gpu, e)
+            await self._stop_worker(self._workers.pop(gpu, None))
+            return False
+
+        if not result.get("ok"):
+            logger.error("[MuseTalk] FAILED: %s", result.get("error"))
+            return False
+        return True
+
+    @staticmethod
+    async def _stop_worker(proc: Optional[asyncio.subprocess.Process]):
+        if proc is None or proc.returncode is not None:
+            return
+        proc.kill()
+        await proc.wait()
+
+    async def close(self):
+        """Stop all persistent workers (app shutdown)"""
+        workers, self._workers = list(self._workers.values()), {}
+        await asyncio.gather(*(self._stop_worker(proc) for proc in workers))
+
+    async def warm_up(self, input_source: str) -> List[Optional[str]]:
+        """
+        Render a short silent clip on every GPU at once so each worker has imported MuseTalk
+        and loaded its checkpoints before the first real turn. The renders bypass the video
+        cache - otherwise only the first worker would actually run one - and since all of them
+        check out a slot before any finishes, each lands on a different GPU.
+        """
+        silence_audio_path = await self._get_silence(0.5)
+        if not silence_audio_path:
+            return []
+        logger.info("[MuseTalk] Warming up %d worker(s)...", len(self.gpus))
+        return list(await asyncio.gather(*(
+            self.generate(
+                input_source=input_source,
+                audio_path=silence_audio_path,
+                output_path=os.path.join(settings.VIDEO_CACHE_DIR, f"warmup_{i}.mp4"),
+                use_cache=False
+            )
+            for i in range(len(self.gpus))
+        )))
+
     async def generate_listening_video(
         self,
         avatar_image: str,
@@ -243,193 +680,979 @@ class MuseTalkAPI:
         Generate listening/nodding video (interviewer listening to candidate).
         """
         try:
-            logger.info(f"[MuseTalk] Generating listening video...")
+            logger.info("[MuseTalk] Generating listening video...")
             
-            silence_audio_path = os.path.join(
-                os.path.dirname(output_path),
-                "silence.wav"
-            )
-            
-            await self._create_silent_audio(
-                silence_audio_path,
-                audio_duration_seconds
-            )
+            silence_audio_path = await self._get_silence(audio_duration_seconds)
+            if not silence_audio_path:
+                return None
             
-            output = await self.generate(
-                avatar_image=avatar_image,
+            # Silence files are shared across turns - never delete them here
+            return await self.generate(
+                input_source=avatar_image,
                 audio_path=silence_audio_path,
-                output_path=output_path,
-                video_type="standard"
+                output_path=output_path
             )
-            
-            if os.path.exists(silence_audio_path):
-                os.remove(silence_audio_path)
-            
-            return output
         
         except Exception as e:
-            logger.error(f"[MuseTalk] Listening video error: {e}", exc_info=True)
+            logger.error("[MuseTalk] Listening video error: %s", e, exc_info=True)
             return None
     
+    async def _get_silence(self, duration_seconds: float) -> Optional[str]:
+        """Shared silent WAV for a duration, rounded to 0.5s so listening turns reuse a handful of files"""
+        # Never round down to an empty clip - MuseTalk can't render 0 frames
+        key = max(0.5, round(duration_seconds * 2) / 2)
+        path = self._silence_cache.get(key)
+        if path and await asyncio.to_thread(os.path.exists, path):
+            return path
+        path = os.path.join(settings.AUDIO_CACHE_DIR, f"silence_{key}.wav")
+        if not await asyncio.to_thread(os.path.exists, path) and not await self._create_silent_audio(path, key):
+            return None
+        self._silence_cache[key] = path
+        return path
+
     async def _create_silent_audio(self, output_path: str, duration_seconds: float) -> bool:
         """Create a silent WAV audio file for listening animations."""
         try:
             sample_rate = 22050
-            duration = int(duration_seconds)
-            num_samples = sample_rate * duration
+            num_samples = int(round(sample_rate * duration_seconds))
             
-            # Minimal WAV header creation
-            wav_header = bytearray()
-            wav_header.extend(b"RIFF")
-            wav_header.extend((36 + num_samples * 2).to_bytes(4, 'little'))
-            wav_header.extend(b"WAVE")
-            wav_header.extend(b"fmt ")
-            wav_header.extend((16).to_bytes(4, 'little'))
-            wav_header.extend((1).to_bytes(2, 'little'))
-            wav_header.extend((1).to_bytes(2, 'little'))
-            wav_header.extend(sample_rate.to_bytes(4, 'little'))
-            wav_header.extend((sample_rate * 2).to_bytes(4, 'little'))
-            wav_header.extend((2).to_bytes(2, 'little'))
-            wav_header.extend((16).to_bytes(2, 'little'))
-            wav_header.extend(b"data")
-            wav_header.extend((num_samples * 2).to_bytes(4, 'little'))
+            wav_header = _wav_header(num_samples, sample_rate)
             
-            with open(output_path, 'wb') as f:
-                f.write(wav_header)
-                f.write(bytes(num_samples * 2))
+            # Header only - the all-zero sample data comes from extending the file.
+            # open/write/ftruncate can still block on slow disks, so keep them off the loop
+            await asyncio.to_thread(
+                _write_buffers, output_path, wav_header, zero_fill_to=len(wav_header) + num_samples * 2
+            )
             
             return True
         except Exception as e:
-            logger.error(f"[Audio] Silent audio creation failed: {e}", exc_info=True)
+            logger.error("[Audio] Silent audio creation failed: %s", e, exc_info=True)
             return False
 
 # ===== PIPER TTS API - ACTUAL AUDIO GENERATION =====
 
 class PiperTTS:
-    """Text-to-Speech using Piper TTS"""
+    """Text-to-Speech using Piper TTS (ONNX voice loaded in-process, piper executable as fallback)"""
     
     def __init__(self):
         self.voice = settings.PIPER_VOICE
         self.speed = settings.PIPER_SPEED
         self.piper_bin = settings.PIPER_BIN
-        os.makedirs(settings.AUDIO_CACHE_DIR, exist_ok=True)
+        self.voice_model = self.voice if self.voice.endswith(".onnx") else f"{self.voice}.onnx"
+        self._voice = None
+        self._voice_failed = False
+        self._rate: Optional[int] = None
+        # ONNX Runtime already spreads one synthesis across every core; running several at once
+        # only oversubscribes the CPU, so lines queue here (and stay out of the default pool)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, settings.PIPER_MAX_CONCURRENCY), thread_name_prefix="piper")
+        # The executable doesn't move at runtime - resolve it once, not per synthesis
+        self._piper_bin_cached = self._find_piper_executable()
+        if self._piper_bin_cached:
+            logger.info("✓ [Piper] Executable: %s", self._piper_bin_cached)
+        else:
+            # Not fatal - the in-process voice doesn't need it - but say so now, not on the first failed line
+            logger.warning("[Piper] Executable not found (%s); CLI fallback unavailable", self.piper_bin)
+        # Voice and speed are fixed for the process - the CLI flags are too
+        self._cli_args = ("--model", self.voice, "--output-raw", "--length_scale", str(self.speed))
+        # Per-line locks live only while someone holds/awaits them (no unbounded growth)
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._pending: set = set()
     
     def _find_piper_executable(self) -> Optional[str]:
-        if self.piper_bin and os.path.exists(self.piper_bin):
-            return self.piper_bin
+        return _resolve_executable(self.piper_bin, "piper")
+    
+    def _cache_path(self, text: str) -> str:
+        """Content-addressed cache location for (voice, speed, text)"""
+        key = hashlib.blake2b(f"{self.voice}|{self.speed}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(settings.AUDIO_CACHE_DIR, f"{key}.wav")
+    
+    def _publish(self, cache_path: str, output_path: str) -> str:
+        """Link the cache entry to the caller's path; without one (or if that fails) serve the entry itself"""
+        if not output_path:
+            return cache_path
+        try:
+            _link_or_copy(cache_path, output_path)
+            return output_path
+        except OSError as e:
+            logger.warning("[Piper] Could not link cached audio to %s: %s", output_path, e)
+            return cache_path
+    
+    def _serve_cached(self, cache_path: str, output_path: str) -> Optional[str]:
+        """Cache probe + publish as one blocking call (run via to_thread); None on a miss"""
+        if not os.path.exists(cache_path):
+            return None
+        return self._publish(cache_path, output_path)
+    
+    async def get_status(self) -> dict:
+        """Executable/voice availability for the health endpoint (filesystem probes run off-loop)"""
+        bin_ok, voice_ok = await _fs_probe(
+            (os.path.isfile, self._piper_bin_cached or ""),
+            (os.path.isfile, self.voice_model),
+        )
+        return {
+            "available": voice_ok and (bin_ok or not self._voice_failed),
+            "executable": bin_ok,
+            "voice": voice_ok,
+            "in_process": self._voice is not None,
+        }
+    
+    async def render_batch(self, texts: List[str], output_paths: List[str]) -> List[Optional[str]]:
+        """
+        Synthesize several lines concurrently (results follow texts). Lines queue on the Piper
+        executor in order; duplicates share one synthesis through the per-line lock and cache.
+        """
+        return list(await asyncio.gather(*(self.synthesize(t, p) for t, p in zip(texts, output_paths))))
+    
+    def prepare_next(self, text: str) -> "asyncio.Task[Optional[str]]":
+        """
+        Start synthesizing text in the background and return the task (resolves to the cache path).
+        A later synthesize() of the same text waits on the same per-key lock and hits the cache.
+        """
+        task = asyncio.create_task(self.synthesize(text, ""))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+    
+    def _load_voice(self) -> bool:
+        """Load the ONNX voice once (in-process synthesis); False means fall back to the CLI"""
+        if self._voice is None and not self._voice_failed:
+            try:
+                from piper import PiperVoice
+                logger.info("[Piper] Loading voice '%s' into memory...", self.voice_model)
+                self._voice = PiperVoice.load(self.voice_model, use_cuda=False)
+            except Exception as e:
+                logger.warning("[Piper] In-process voice unavailable, using the piper executable: %s", e)
+                self._voice_failed = True
+        return self._voice is not None
+    
+    def _synth_to_wav(self, text: str, output_path: str):
+        from piper import SynthesisConfig
+        with wave.open(output_path, "wb") as wav_file:
+            self._voice.synthesize_wav(text, wav_file, syn_config=SynthesisConfig(length_scale=self.speed))
+    
+    def _sample_rate(self) -> int:
+        """Output rate of the voice (from its .onnx.json config), read once"""
+        if self._rate is None:
+            try:
+                with open(f"{self.voice_model}.json", "rb") as f:
+                    self._rate = int(orjson.loads(f.read())["audio"]["sample_rate"])
+            except (OSError, KeyError, ValueError):
+                self._rate = 22050
+        return self._rate
+    
+    async def _synthesize_cli(self, text: str, output_path: str) -> bool:
+        """
+        Fallback: one piper process per line (pays process start + model load every time).
+        Raw PCM is streamed from stdout into the WAV as it arrives instead of being buffered.
+        """
+        piper_bin = self._piper_bin_cached
+        if not piper_bin:
+            logger.error("✗ [Piper] Executable not found")
+            return False
+        
+        sample_rate = self._sample_rate()
+        
+        # Native async subprocess - the event loop stays free while Piper runs
+        proc = await asyncio.create_subprocess_exec(
+            piper_bin,
+            *self._cli_args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        proc.stdin.write(text.encode("utf-8"))
+        proc.stdin.close()
+        
+        async def pump() -> int:
+            # aiofiles runs open/write/seek in a thread - no disk I/O on the event loop
+            written = 0
+            async with aiofiles.open(output_path, "wb") as f:
+                await f.write(_wav_header(0, sample_rate))
+                while chunk := await proc.stdout.read(65536):
+                    await f.write(chunk)
+                    written += len(chunk)
+                # Sizes are only known at the end - patch them into the header
+                await f.seek(0)
+                await f.write(_wav_header(written // 2, sample_rate))
+            return written
         
         try:
-            cmd = ['where', 'piper'] if os.name == 'nt' else ['which', 'piper']
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except Exception:
-            pass
-        return None
+            written, stderr, _ = await asyncio.wait_for(
+                asyncio.gather(pump(), _read_tail(proc.stderr), proc.wait()),
+                timeout=60
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            logger.error("✗ [Piper] Timed out")
+            return False
+        
+        if proc.returncode != 0 or not written:
+            logger.error("✗ [Piper] FAILED (code %s): %s", proc.returncode, stderr.decode('utf-8', errors='replace')[-500:])
+            return False
+        return True
     
     async def synthesize(self, text: str, output_path: str) -> Optional[str]:
+        """
+        Synthesize text to WAV.
+        Audio comes from the content-addressed cache in AUDIO_CACHE_DIR (repeated lines skip
+        Piper entirely) and is hardlinked to output_path; an empty output_path returns the entry.
+        """
+        temp_path = None
         try:
             clean_text = text.strip()
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            piper_bin = self._find_piper_executable()
-            if not piper_bin:
-                logger.error(f"✗ [Piper] Executable not found")
-                return None
+            cache_path = self._cache_path(clean_text)
+            served = await asyncio.to_thread(self._serve_cached, cache_path, output_path)
+            if served:
+                logger.info("✓ [Piper] Cache hit: %s", os.path.basename(cache_path))
+                return served
             
-            cmd = [
-                piper_bin,
-                "--model", self.voice,
-                "--output_file", output_path,
-                "--length_scale", str(self.speed),
-            ]
-            
-            result = await asyncio.to_thread(
-                subprocess.run,
-                cmd,
-                input=clean_text,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            if result.returncode != 0 or not os.path.exists(output_path):
-                logger.error(f"✗ [Piper] FAILED (code {result.returncode})")
-                return None
+            # Dedupe concurrent synthesis of the same line
+            lock = self._locks.get(cache_path)
+            if lock is None:
+                lock = self._locks[cache_path] = asyncio.Lock()
+            async with lock:
+                served = await asyncio.to_thread(self._serve_cached, cache_path, output_path)
+                if served:
+                    return served
+                
+                # Synthesize next to the cache, then atomically publish it
+                with tempfile.NamedTemporaryFile(dir=settings.AUDIO_CACHE_DIR, suffix=".wav", delete=False) as tmp:
+                    temp_path = tmp.name
+                
+                if self._voice is not None or await asyncio.to_thread(self._load_voice):
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self._synth_to_wav, clean_text, temp_path
+                    )
+                    if not await asyncio.to_thread(_regular_file_size, temp_path):
+                        logger.error("✗ [Piper] In-process synthesis produced no audio")
+                        return None
+                elif not await self._synthesize_cli(clean_text, temp_path):
+                    return None
+                
+                await asyncio.to_thread(os.replace, temp_path, cache_path)
+                temp_path = None
             
-            return output_path
+            return await asyncio.to_thread(self._publish, cache_path, output_path)
         except Exception as e:
-            logger.error(f"✗ [Piper] EXCEPTION: {e}", exc_info=True)
+            logger.error("✗ [Piper] EXCEPTION: %s", e, exc_info=True)
             return None
+        finally:
+            if temp_path:
+                try: os.remove(temp_path)
+                except OSError: pass
 
 # ===== WHISPER API - SPEECH TO TEXT =====
 
+WHISPER_SAMPLE_RATE = 16000
+
+def _decode_audio(data: bytes) -> np.ndarray:
+    """
+    Decode an uploaded clip in memory to 16 kHz mono float32.
+    WAV/PCM goes through soundfile; the browser's webm/opus recordings fall back to PyAV.
+    """
+    try:
+        audio, sr = sf.read(io.BytesIO(data), dtype="float32")
+    except (sf.LibsndfileError, RuntimeError, TypeError):
+        from faster_whisper.audio import decode_audio
+        return decode_audio(io.BytesIO(data), sampling_rate=WHISPER_SAMPLE_RATE)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != WHISPER_SAMPLE_RATE:
+        # soxr is what librosa.resample delegates to - call it without importing librosa/numba
+        import soxr
+        audio = soxr.resample(audio, sr, WHISPER_SAMPLE_RATE)
+    return audio
+
+
+class _ChunkPipe:
+    """
+    Read-only, non-seekable file over chunks fed from the event loop.
+    read() blocks until the next chunk (or close()), so PyAV can demux a recording while it arrives.
+    """
+
+    def __init__(self):
+        self._chunks: deque = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def feed(self, data: bytes) -> None:
+        with self._cond:
+            self._chunks.append(data)
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._cond:
+            while not self._chunks and not self._closed:
+                self._cond.wait()
+            if not self._chunks:
+                return b""
+            chunk = self._chunks[0]
+            if size < 0 or size >= len(chunk):
+                return self._chunks.popleft()
+            self._chunks[0] = chunk[size:]
+            return chunk[:size]
+
+
+class _PcmBuffer:
+    """Growable 16 kHz float32 buffer: appended by the decoder thread, read as snapshots by passes"""
+
+    def __init__(self):
+        self._data = np.empty(30 * WHISPER_SAMPLE_RATE, dtype=np.float32)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def append(self, samples: np.ndarray) -> None:
+        with self._lock:
+            end = self._size + len(samples)
+            if end > len(self._data):
+                # Amortized doubling - earlier snapshots keep pointing at the old array
+                grown = np.empty(max(end, 2 * len(self._data)), dtype=np.float32)
+                grown[:self._size] = self._data[:self._size]
+                self._data = grown
+            self._data[self._size:end] = samples
+            self._size = end
+
+    def view(self) -> np.ndarray:
+        # Samples before _size are never rewritten, so the slice stays valid after later appends
+        with self._lock:
+            return self._data[:self._size]
+
+
+def _decode_live(pipe: _ChunkPipe, pcm: _PcmBuffer, stream: "StreamingSession") -> None:
+    """Decoder thread for one live answer: each uploaded byte is demuxed and decoded exactly once"""
+    try:
+        import av
+        # Tiny probe so opening doesn't wait for megabytes of audio that haven't been recorded yet
+        with av.open(pipe, mode="r", options={"probesize": "32", "analyzeduration": "0"}) as container:
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=WHISPER_SAMPLE_RATE)
+            for frame in container.decode(audio=0):
+                for out in resampler.resample(frame):
+                    pcm.append(out.to_ndarray().reshape(-1))
+    except Exception as e:
+        logger.debug("[Whisper] Live decoder stopped, falling back to full decodes: %s", e)
+        stream.decoder_failed = True
+
+
+class StreamingSession:
+    """
+    Rolling state for one speaker's live transcription (LocalAgreement-2).
+    A word is confirmed once two consecutive passes over the growing buffer agree on it;
+    audio before the last confirmed word is trimmed from later passes.
+    Chunks are decoded incrementally on a per-answer thread into a growing PCM buffer.
+    """
+
+    def __init__(self):
+        self.encoded: List[bytes] = []   # uploaded chunks (kept for the full-decode fallback)
+        self.confirmed: List[str] = []
+        self.committed_at = 0.0          # seconds - end of the last confirmed word
+        self.last_hypothesis: List[Tuple[float, float, str]] = []
+        self.processed_samples = 0
+        self.busy = False
+        self.pass_task: Optional[asyncio.Future] = None
+        self.decoder_failed = False
+        self._pipe = _ChunkPipe()
+        self._pcm = _PcmBuffer()
+        self._decoder: Optional[threading.Thread] = None
+
+    def feed(self, chunk: bytes) -> None:
+        self.encoded.append(chunk)
+        self._pipe.feed(chunk)
+        if self._decoder is None:
+            self._decoder = threading.Thread(
+                target=_decode_live, args=(self._pipe, self._pcm, self), name="whisper-live", daemon=True
+            )
+            self._decoder.start()
+
+    def audio(self) -> np.ndarray:
+        """Everything decoded so far (blocking; call from a worker thread)"""
+        if self.decoder_failed:
+            return _decode_audio(b"".join(self.encoded))
+        return self._pcm.view()
+
+    def close(self) -> None:
+        """Let the decoder thread drain what it has and exit"""
+        self._pipe.close()
+
+    @property
+    def text(self) -> str:
+        pending = " ".join(word for _, _, word in self.last_hypothesis)
+        return " ".join(filter(None, (" ".join(self.confirmed), pending)))
+
+def _norm_word(word: str) -> str:
+    return word.strip().lower().strip(".,!?;:\"'")
+
 class WhisperAPI:
-    """Speech-to-Text using OpenAI Whisper Python Library (No Subprocess)"""
+    """Speech-to-Text using faster-whisper (CTranslate2, in-process, model loaded once)"""
     
     def __init__(self):
         self.api_key = settings.OPENAI_API_KEY
         self.model_name = settings.WHISPER_MODEL
         self.model = None
+        self._model_lock = asyncio.Lock()
+        self._batch_decode_ok = True
+        # Concurrent transcribe_full calls are coalesced here and decoded as one batch
+        self._batch_queue: asyncio.Queue = asyncio.Queue()
+        self._batch_task: Optional[asyncio.Task] = None
+        self._streams: Dict[str, StreamingSession] = {}
         
         # Inject FFmpeg path once during init
         self._inject_ffmpeg()
-        logger.info(f"✓ WhisperAPI initialized: model={self.model_name}")
+        logger.info("✓ WhisperAPI initialized: model=%s", self.model_name)
 
     def _inject_ffmpeg(self):
         """Inject local FFmpeg into PATH"""
         ffmpeg_path = os.path.join(settings.MUSETALK_ROOT, "ffmpeg", "bin")
         if os.path.exists(ffmpeg_path):
-            logger.info(f"[Whisper] Injecting local FFmpeg into PATH: {ffmpeg_path}")
+            logger.info("[Whisper] Injecting local FFmpeg into PATH: %s", ffmpeg_path)
             os.environ["PATH"] = ffmpeg_path + os.pathsep + os.environ["PATH"]
 
     def _load_model(self):
         """Lazy load model to avoid locking startup"""
         if self.model is None:
-            import whisper
-            logger.info(f"[Whisper] Loading model '{self.model_name}' into memory...")
-            self.model = whisper.load_model(self.model_name)
+            from faster_whisper import WhisperModel
+            # CTranslate2's fused fp16 kernels on GPU; int8 weights keep CPU decode tolerable
+            if _has_cuda():
+                device, compute_type = "cuda", "float16"
+            else:
+                device, compute_type = "cpu", "int8"
+            if settings.WHISPER_COMPUTE_TYPE != "auto":
+                compute_type = settings.WHISPER_COMPUTE_TYPE
+            logger.info("[Whisper] Loading model '%s' (%s, %s) into memory...", self.model_name, device, compute_type)
+            self.model = WhisperModel(
+                self.model_name,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=settings.WHISPER_CPU_THREADS or os.cpu_count() or 0,
+                download_root=settings.MODEL_CACHE_DIR
+            )
     
-    async def transcribe_full(self, audio_bytes: bytes) -> dict:
-        """Transcribe audio bytes using Whisper Python API"""
-        import tempfile
-        import whisper
-        temp_path = None
-        
+    async def _ensure_model(self):
+        """Load the model once - concurrent first callers (warm-up, live captions, final pass) share one load"""
+        if self.model is None:
+            async with self._model_lock:
+                if self.model is None:
+                    await asyncio.to_thread(self._load_model)
+    
+    async def warm_up(self):
+        """Load the model at startup (in a thread) so the first answer doesn't wait on it"""
+        try:
+            await self._ensure_model()
+        except Exception as e:
+            logger.error("[Whisper] Warm-up failed, will retry on first use: %s", e)
+    
+    def _transcribe_one(self, audio: np.ndarray) -> str:
+        # segments is a lazy generator - consume it in the calling thread too
+        segments, _ = self.model.transcribe(audio, beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments)
+
+    def _transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """
+        Greedy-decode several clips in one CTranslate2 generate() call.
+        Clips up to one 30s window are padded and stacked; longer ones go through the normal path.
+        """
+        window = 30 * WHISPER_SAMPLE_RATE
+        texts: List[Optional[str]] = [None] * len(audios)
+        short = [i for i, audio in enumerate(audios) if len(audio) <= window]
+        if len(short) > 1 and self._batch_decode_ok:
+            try:
+                for i, text in zip(short, self._decode_window_batch([audios[i] for i in short])):
+                    texts[i] = text
+            except (ImportError, AttributeError, TypeError) as e:
+                # This path reaches into faster-whisper internals - on an incompatible version
+                # stop trying and transcribe clip by clip from now on
+                logger.warning("[Whisper] Batched decode unavailable (%s) - using per-clip decode", e)
+                self._batch_decode_ok = False
+        return [text if text is not None else self._transcribe_one(audio) for text, audio in zip(texts, audios)]
+
+    def _decode_window_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """Encode the clips once, detect each clip's language (as transcribe() does), then decode together"""
+        import ctranslate2
+        from faster_whisper.tokenizer import Tokenizer
+
+        window = 30 * WHISPER_SAMPLE_RATE
+        n_frames = self.model.feature_extractor.nb_max_frames
+        features = np.stack([
+            self.model.feature_extractor(np.pad(audio, (0, window - len(audio))))[:, :n_frames]
+            for audio in audios
+        ]).astype(np.float32)
+        whisper = self.model.model
+        encoder_output = whisper.encode(ctranslate2.StorageView.from_array(np.ascontiguousarray(features)), to_cpu=False)
+
+        if whisper.is_multilingual:
+            # Most likely language token per clip, e.g. "<|en|>" -> "en"
+            languages = [result[0][0][2:-2] for result in whisper.detect_language(encoder_output)]
+        else:
+            languages = ["en"] * len(audios)
+        tokenizers = {
+            language: Tokenizer(self.model.hf_tokenizer, whisper.is_multilingual, task="transcribe", language=language)
+            for language in set(languages)
+        }
+        prompts = [
+            [*tokenizers[language].sot_sequence, tokenizers[language].no_timestamps]
+            for language in languages
+        ]
+        results = whisper.generate(
+            encoder_output,
+            prompts,
+            beam_size=1,
+            max_length=self.model.max_length,
+            suppress_blank=True,
+        )
+        return [
+            tokenizers[language].decode(result.sequences_ids[0]).strip()
+            for language, result in zip(languages, results)
+        ]
+
+    async def _batch_loop(self):
+        """Collect up to WHISPER_BATCH_SIZE requests within WHISPER_BATCH_WINDOW_MS and run them together"""
+        loop = asyncio.get_running_loop()
+        window = settings.WHISPER_BATCH_WINDOW_MS / 1000
+        while True:
+            items = [await self._batch_queue.get()]
+            deadline = loop.time() + window
+            while len(items) < settings.WHISPER_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._batch_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            audios = [audio for audio, _ in items]
+            try:
+                if len(audios) == 1:
+                    texts = [await asyncio.to_thread(self._transcribe_one, audios[0])]
+                else:
+                    logger.info("[Whisper] Batch of %d clips", len(audios))
+                    texts = await asyncio.to_thread(self._transcribe_batch, audios)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), text in zip(items, texts):
+                if not future.done():
+                    future.set_result(text)
+
+    def _stream_pass(self, stream: StreamingSession) -> None:
+        """One LocalAgreement-2 pass over the buffered audio after the committed point"""
+        audio = stream.audio()
+        start = int(stream.committed_at * WHISPER_SAMPLE_RATE)
+        if len(audio) - stream.processed_samples < settings.WHISPER_STREAM_MIN_CHUNK_SECONDS * WHISPER_SAMPLE_RATE:
+            return
+        stream.processed_samples = len(audio)
+
+        segments, _ = self.model.transcribe(
+            audio[start:],
+            beam_size=1,
+            word_timestamps=True,
+            initial_prompt=" ".join(stream.confirmed)[-200:] or None,
+        )
+        hypothesis = [
+            (stream.committed_at + w.start, stream.committed_at + w.end, w.word.strip())
+            for segment in segments for w in (segment.words or [])
+        ]
+
+        # Confirm the longest prefix both passes agree on
+        agreed = 0
+        for (_, _, new), (_, _, old) in zip(hypothesis, stream.last_hypothesis):
+            if _norm_word(new) != _norm_word(old):
+                break
+            agreed += 1
+        if agreed:
+            stream.confirmed.extend(word for _, _, word in hypothesis[:agreed])
+            stream.committed_at = hypothesis[agreed - 1][1]
+        stream.last_hypothesis = hypothesis[agreed:]
+
+    async def transcribe_streaming(self, session_id: str, audio_chunk: bytes) -> dict:
+        """
+        Add a live chunk for session_id and return {"partial_transcription": confirmed + pending}.
+        A pass runs once at least WHISPER_STREAM_MIN_CHUNK_SECONDS of new audio has arrived;
+        chunks that land while a pass is running are just buffered.
+        """
+        stream = self._streams.get(session_id)
+        if stream is None:
+            stream = self._streams[session_id] = StreamingSession()
+        stream.feed(audio_chunk)
+        if stream.busy or (stream.pass_task is not None and not stream.pass_task.done()):
+            return {"partial_transcription": stream.text}
+
+        stream.busy = True
+        try:
+            await self._ensure_model()
+            stream.pass_task = asyncio.ensure_future(asyncio.to_thread(self._stream_pass, stream))
+            # Shielded: if the caller is cancelled the pass still runs to completion,
+            # and end_stream() waits for it rather than leaving it on the model
+            await asyncio.shield(stream.pass_task)
+        except Exception as e:
+            logger.debug("[Whisper] Streaming pass failed: %s", e)
+        finally:
+            stream.busy = False
+        return {"partial_transcription": stream.text}
+
+    async def end_stream(self, session_id: str) -> None:
+        """
+        Drop live-transcription state once the answer is complete (or the socket is gone).
+        Waits for an in-flight pass so it doesn't compete with the final transcription.
+        """
+        stream = self._streams.pop(session_id, None)
+        if stream is None:
+            return
+        stream.close()
+        if stream.pass_task is not None:
+            await asyncio.gather(stream.pass_task, return_exceptions=True)
+
+    async def close(self):
+        """Stop the batching loop and live decoders (app shutdown)"""
+        for session_id in list(self._streams):
+            await self.end_stream(session_id)
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            await asyncio.gather(self._batch_task, return_exceptions=True)
+
+    async def transcribe_full(self, audio_bytes: Union[bytes, List[bytes]]) -> dict:
+        """
+        Transcribe audio with the cached faster-whisper model.
+        Accepts the raw bytes or the list of received chunks; audio is decoded in memory (no temp file).
+        """
         try:
             # Load model if not ready (runs in thread to avoid blocking)
-            if self.model is None:
-                await asyncio.to_thread(self._load_model)
+            await self._ensure_model()
 
-            # Save audio to temp file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-                f.write(audio_bytes)
-                temp_path = f.name
-            
-            logger.info(f"[Whisper] Transcribing file...")
+            data = audio_bytes if isinstance(audio_bytes, (bytes, bytearray, memoryview)) else b"".join(audio_bytes)
             
-            # Run transcription in thread
-            def _run_transcribe():
-                return self.model.transcribe(temp_path, fp16=False) 
+            logger.info("[Whisper] Transcribing %d bytes...", len(data))
             
-            result = await asyncio.to_thread(_run_transcribe)
-            text = result["text"].strip()
+            # Decode here (in a thread), then hand the samples to the batching loop
+            audio = await asyncio.to_thread(_decode_audio, data)
+            if self._batch_task is None or self._batch_task.done():
+                self._batch_task = asyncio.create_task(self._batch_loop())
+            future = asyncio.get_running_loop().create_future()
+            await self._batch_queue.put((audio, future))
+            text = (await future).strip()
             
-            logger.info(f"✓ [Whisper] Transcribed: {text[:100]}...")
+            logger.info("✓ [Whisper] Transcribed: %s...", text[:100])
             return {"full_transcription": text}
         
         except Exception as e:
-            logger.error(f"[Whisper] Error: {e}", exc_info=True)
+            logger.error("[Whisper] Error: %s", e, exc_info=True)
             return {"full_transcription": ""}
-        finally:
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+
+# ===== SENTENCE EMBEDDINGS + SEMANTIC CACHE =====
+
+class OnnxSentenceEncoder:
+    """
+    Sentence encoder on ONNX Runtime using the int8-quantized export of the model.
+    Same output as sentence-transformers (mean pooling + L2 norm) without loading torch.
+    """
+    
+    def __init__(self, model_id: str, file_name: str):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        from huggingface_hub import hf_hub_download
+        
+        model_path = hf_hub_download(model_id, file_name)
+        tokenizer_path = hf_hub_download(model_id, "tokenizer.json")
+        
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=256)
+        self.tokenizer.enable_padding()
+        # GPU when the onnxruntime-gpu build is installed, else CPU (asking for a missing provider only warns)
+        available = ort.get_available_providers()
+        providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in available]
+        self.session = ort.InferenceSession(model_path, providers=providers or None)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: Union[str, List[str]], normalize_embeddings: bool = True) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = self.tokenizer.encode_batch([texts] if single else list(texts))
+        
+        input_ids = np.array([e.ids for e in batch], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in batch], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        
+        token_embeddings = self.session.run(None, feeds)[0]
+        
+        # Mean pooling over real (non-padding) tokens
+        mask = attention_mask[..., np.newaxis].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if normalize_embeddings:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled[0] if single else pooled
+
+_encoder = None
+
+def _get_encoder():
+    """Lazy load the sentence encoder (heavy import, only pay for it on first use)"""
+    global _encoder
+    if _encoder is None:
+        logger.info("[Embed] Loading encoder '%s' (%s)...", settings.EMBEDDING_MODEL, settings.EMBEDDING_BACKEND)
+        if settings.EMBEDDING_BACKEND == "onnx":
+            _encoder = OnnxSentenceEncoder(settings.EMBEDDING_MODEL, settings.EMBEDDING_ONNX_FILE)
+        else:
+            from sentence_transformers import SentenceTransformer
+            _encoder = SentenceTransformer(settings.EMBEDDING_MODEL, device="cpu")
+    return _encoder
+
+@lru_cache(maxsize=4096)
+def embed(text: str) -> np.ndarray:
+    """L2-normalized float32 embedding of text (cached, treat as read-only)"""
+    vector = _get_encoder().encode(text, normalize_embeddings=True).astype(np.float32)
+    vector.flags.writeable = False
+    return vector
+
+def embed_batch(texts: List[str]) -> np.ndarray:
+    """L2-normalized float32 embeddings for many texts in one encoder pass (rows follow texts)"""
+    unique = list(dict.fromkeys(texts))
+    vectors = np.asarray(_get_encoder().encode(unique, normalize_embeddings=True), dtype=np.float32)
+    if len(unique) == len(texts):
+        return vectors
+    row = {text: i for i, text in enumerate(unique)}
+    return vectors[[row[text] for text in texts]]
+
+def embed_conditioned(parts: Tuple[str, ...]) -> np.ndarray:
+    """
+    Multi-part key, e.g. (job_description, question, answer): the unit embedding of each
+    part, concatenated. Use with SemanticCache(parts=len(parts)) so every part is
+    thresholded on its own. Repeated parts (job, question) hit embed()'s cache.
+    """
+    return np.concatenate([embed(part) for part in parts])
+
+class SemanticCache:
+    """
+    Prompt -> response cache for LLM calls.
+    Exact prompt matches are served from an LRU; otherwise the closest stored
+    prompt by cosine similarity is used if it clears the threshold.
+    Keys made of several concatenated unit embeddings (parts > 1) only match
+    when every part clears the threshold on its own.
+    Puts are persisted in the background, at most once per save_delay seconds.
+    """
+    
+    save_delay = 5.0
+    
+    def __init__(self, name: str, threshold: float = None, maxsize: int = 1024, embed_fn=embed, parts: int = 1):
+        self.embed_fn = embed_fn
+        self.parts = parts
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.maxsize = maxsize
+        self.path = os.path.join(settings.CACHE_DIR, f"{name}_semantic_cache")
+        self.exact: "OrderedDict[str, str]" = OrderedDict()
+        self.prompts: List[str] = []
+        self.responses: List[str] = []
+        self.embeddings: Optional[np.ndarray] = None
+        # embed_fn=None: exact-prompt LRU only
+        self.semantic_enabled = embed_fn is not None
+        self._dirty = False
+        self._save_lock = asyncio.Lock()
+        self._save_task: Optional[asyncio.Task] = None
+        self._load()
+
+    def _load(self):
+        """Restore persisted entries so the cache survives restarts"""
+        try:
+            if not os.path.exists(self.path + ".json"):
+                return
+            with open(self.path + ".json", "rb") as f:
+                data = orjson.loads(f.read())
+            prompts, responses = data["prompts"], data["responses"]
+            embeddings = np.load(self.path + ".npy")
+            if not len(prompts) == len(responses) == len(embeddings):
+                raise ValueError(f"{len(prompts)} prompts vs {len(embeddings)} embeddings")
+            self.prompts, self.responses, self.embeddings = prompts, responses, embeddings
+            for prompt, response in zip(self.prompts, self.responses):
+                self.exact[prompt] = response
+            logger.info("[Cache] Loaded %s entries from %s", len(self.prompts), self.path)
+        except Exception as e:
+            logger.warning("[Cache] Could not load %s: %s", self.path, e)
+            self.prompts, self.responses, self.embeddings = [], [], None
+
+    def _save(self, prompts: List[str], responses: List[str], embeddings: np.ndarray):
+        """Write each file to a temp name and rename it over the old one (never half-written)"""
+        for suffix, write in (
+            (".npy", lambda f: np.save(f, embeddings)),
+            (".json", lambda f: f.write(orjson.dumps({"prompts": prompts, "responses": responses}))),
+        ):
+            tmp_path = self.path + suffix + ".tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, self.path + suffix)
+
+    async def flush(self):
+        """Persist the current entries now; one writer at a time"""
+        async with self._save_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            try:
+                # Snapshot so later puts can't mutate the lists mid-write
+                await asyncio.to_thread(self._save, list(self.prompts), list(self.responses), self.embeddings)
+            except Exception as e:
+                self._dirty = True
+                logger.warning("[Cache] Could not persist %s: %s", self.path, e)
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        await self.flush()
+
+    async def close(self):
+        """Cancel the pending debounced save and write anything outstanding"""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+            await asyncio.gather(self._save_task, return_exceptions=True)
+        await self.flush()
+
+    async def _embed(self, key) -> Optional[np.ndarray]:
+        if not self.semantic_enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self.embed_fn, key)
+        except Exception as e:
+            # Encoder unavailable - degrade to exact-match only
+            logger.warning("[Cache] Semantic lookup disabled: %s", e)
+            self.semantic_enabled = False
+            return None
+
+    async def get(self, prompt: str, semantic_key=None) -> Optional[str]:
+        """semantic_key overrides what is embedded for the similarity lookup (defaults to prompt)"""
+        if prompt in self.exact:
+            self.exact.move_to_end(prompt)
+            return self.exact[prompt]
+        
+        if self.embeddings is None or not len(self.embeddings):
+            return None
+        
+        vector = await self._embed(prompt if semantic_key is None else semantic_key)
+        if vector is None or vector.shape[0] != self.embeddings.shape[1]:
+            return None
+        
+        if self.parts == 1:
+            scores = self.embeddings @ vector
+        else:
+            # Per-part cosine, then the weakest part decides
+            scores = np.einsum(
+                "npd,pd->np",
+                self.embeddings.reshape(len(self.embeddings), self.parts, -1),
+                vector.reshape(self.parts, -1),
+            ).min(axis=1)
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            logger.info("[Cache] Semantic hit (similarity=%.3f)", scores[best])
+            return self.responses[best]
+        return None
+
+    async def put(self, prompt: str, response: str, semantic_key=None):
+        self.exact[prompt] = response
+        if len(self.exact) > self.maxsize:
+            self.exact.popitem(last=False)
+        
+        vector = await self._embed(prompt if semantic_key is None else semantic_key)
+        if vector is None:
+            return
+        
+        if self.embeddings is not None and self.embeddings.shape[1] != vector.shape[0]:
+            # Persisted index was built with a different key layout/model - start over
+            self.prompts, self.responses, self.embeddings = [], [], None
+        
+        self.prompts.append(prompt)
+        self.responses.append(response)
+        row = vector[np.newaxis, :]
+        self.embeddings = row if self.embeddings is None else np.vstack([self.embeddings, row])
+        if len(self.prompts) > self.maxsize:
+            self.prompts = self.prompts[-self.maxsize:]
+            self.responses = self.responses[-self.maxsize:]
+            self.embeddings = self.embeddings[-self.maxsize:]
+        
+        # Coalesce bursts of puts into one rewrite of the index
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+# Question generation: an identical prompt is always reusable. Semantic reuse needs an
+# explicit key from the caller - the real job description plus the previous question
+# (new topic) or the candidate's answer (follow-ups), each thresholded on its own - and
+# only within one kind of question. The prompt itself is never embedded: its template
+# would dominate and make every role and answer look alike.
+_generation_cache = SemanticCache("questions", embed_fn=None)
+_question_caches = {
+    kind: SemanticCache(f"questions_{kind}", embed_fn=embed_conditioned, parts=parts)
+    for kind, parts in (("opening", 1), ("new_topic", 2), ("follow_up", 2), ("follow_up_deeper", 2))
+}
+# Keyed on (job, question, answer) - each must clear the threshold by itself, so a shared
+# job or question can't carry a different answer over it
+_correctness_cache = SemanticCache("answer_correctness", embed_fn=embed_conditioned, parts=3)
+
+async def close_semantic_caches() -> None:
+    """Write out pending cache entries (call on shutdown)"""
+    await asyncio.gather(
+        _generation_cache.close(), _correctness_cache.close(),
+        *(cache.close() for cache in _question_caches.values())
+    )
 
 # ===== HUGGINGFACE API - LLM INFERENCE =====
 
+# One InferenceClient per process so every HuggingFaceAPI instance shares it.
+# Calls run on a dedicated pool rather than the default executor: huggingface_hub keeps
+# one pooled requests.Session per thread, so these long-lived threads reuse keep-alive
+# connections, and the pool size bounds in-flight LLM calls (HF rate limits).
+_hf_client: Optional[InferenceClient] = None
+_HF_POOL = ThreadPoolExecutor(max_workers=max(1, settings.HF_MAX_CONCURRENCY), thread_name_prefix="hf")
+
+def get_hf_client() -> InferenceClient:
+    """Return the shared InferenceClient, creating it on first use"""
+    global _hf_client
+    if _hf_client is None:
+        _hf_client = InferenceClient(token=settings.HUGGINGFACE_API_KEY)
+    return _hf_client
+
+# The job-description header is identical for every answer in an interview - build it once
+_CORRECTNESS_SUFFIX = "\n\nOutput STRICTLY in this format:\nRATING: [good/partial/poor]\nFEEDBACK: [One sentence feedback] [/INST]"
+
+_RATING_RE = re.compile(r"RATING:\s*(good|partial|poor)\s*\n?\s*FEEDBACK:\s*(.+)", re.IGNORECASE | re.DOTALL)
+_NUM_PREFIX_RE = re.compile(r"^\d+[\.\)\-]\s*")
+_SCORE_RE = re.compile(r"SCORE:\s*(\d+)", re.IGNORECASE)
+_FEEDBACK_RE = re.compile(r"FEEDBACK:\s*(.*)", re.IGNORECASE)
+
+@lru_cache(maxsize=256)
+def _correctness_prefix(job_description: str) -> str:
+    return "<s>[INST] Judge the technical correctness of this interview answer.\nRole: " + job_description + "\n"
+
+# Fallbacks when the API fails or no token is configured
+_FALLBACK_QUESTIONS = "Tell me about yourself.\nWhat are your strengths?\nDescribe a challenge you faced.\nWhy do you want this job?\nAny questions for us?"
+_FALLBACK_EVALUATION = {"score": 5, "marks": "5/10", "feedback": "Evaluation unavailable."}
+_FALLBACK_CORRECTNESS = {"assessment": "partial", "feedback": "Reasonable answer."}
+
+# Batched evaluation: every answer in one prompt, scored as a JSON list in one round-trip
+_BATCH_EVALUATION_SUFFIX = (
+    "\n\nReturn ONLY a JSON list with one object per answer, in the same order:\n"
+    '[{"score": <1-10>, "feedback": "<one sentence>"}, ...] [/INST]'
+)
+_JSON_DECODER = json.JSONDecoder()
+
+def _first_json_list(text: str) -> list:
+    """First well-formed JSON list in LLM output; prose or bracketed text around it is skipped"""
+    start = text.find("[")
+    while start != -1:
+        try:
+            value, _ = _JSON_DECODER.raw_decode(text, start)
+            if isinstance(value, list):
+                return value
+        except ValueError:
+            pass
+        start = text.find("[", start + 1)
+    return []
+
+def _clamp_score(score: int) -> int:
+    return min(10, max(1, score))
+
 class HuggingFaceAPI:
     """LLM inference using HuggingFace models"""
     
@@ -437,23 +1660,59 @@ class HuggingFaceAPI:
         self.api_key = settings.HUGGINGFACE_API_KEY
         # CHANGED: Use Mistral Instruct v0.2 which supports text-generation better on free tier
         self.model = "mistralai/Mistral-7B-Instruct-v0.2" 
-        self.client = InferenceClient(token=self.api_key)
-        logger.info(f"✓ HuggingFaceAPI initialized: model={self.model}")
+        self.client = get_hf_client()
+        
+        if not self.api_key:
+            # No token: every call would fail and fall back anyway - bind the fallbacks
+            # directly so the hot path skips the request, the error and its log line
+            logger.warning("[HF] HUGGINGFACE_API_KEY not set - using fallback questions/evaluations")
+            self.generate = self._stub_generate
+            self.evaluate_response = self._stub_evaluate_response
+            self.evaluate_responses = self._stub_evaluate_responses
+            self.evaluate_correctness = self._stub_evaluate_correctness
+        
+        logger.info("✓ HuggingFaceAPI initialized: model=%s", self.model)
+
+    async def _stub_generate(self, job_description: str, kind: Optional[str] = None, cache_key: Tuple[str, ...] = ()) -> str:
+        return _FALLBACK_QUESTIONS
+
+    async def _stub_evaluate_response(self, question: str, response: str, job_description: str) -> dict:
+        return dict(_FALLBACK_EVALUATION)
+
+    async def _stub_evaluate_responses(self, items: List[Tuple[str, str, str]]) -> List[dict]:
+        return [dict(_FALLBACK_EVALUATION) for _ in items]
+
+    async def _stub_evaluate_correctness(self, question: str, response: str, job_description: str) -> dict:
+        return dict(_FALLBACK_CORRECTNESS)
+
+    async def _text_generation(self, prompt: str, **kwargs) -> str:
+        """Run a text-generation call on the HF pool (bounded to HF_MAX_CONCURRENCY at once)"""
+        return await asyncio.get_running_loop().run_in_executor(
+            _HF_POOL,
+            partial(self.client.text_generation, prompt, model=self.model, **kwargs)
+        )
     
-    async def generate(self, job_description: str) -> Union[str, list]:
+    async def generate(self, job_description: str, kind: Optional[str] = None, cache_key: Tuple[str, ...] = ()) -> Union[str, list]:
         """
         Generate 5 interview questions based on job description.
+        kind + cache_key opt in to semantic reuse (see _question_caches); without them
+        only an identical prompt is served from cache.
         """
         try:
-            logger.info(f"[HF] Generating interview questions via API...")
+            logger.info("[HF] Generating interview questions via API...")
             
             # Mistral Instruct Format
             prompt = f"<s>[INST] You are an expert technical interviewer. Generate exactly 5 distinct technical interview questions for a candidate applying for this role: '{job_description}'. Return ONLY the questions as a numbered list. [/INST]"
             
-            response = await asyncio.to_thread(
-                self.client.text_generation,
+            cache = _question_caches.get(kind, _generation_cache) if cache_key else _generation_cache
+            if settings.SEMANTIC_CACHE_ENABLED:
+                cached = await cache.get(prompt, semantic_key=cache_key or None)
+                if cached:
+                    logger.info("✓ [HF] Served questions from cache")
+                    return cached
+            
+            response = await self._text_generation(
                 prompt,
-                model=self.model,
                 max_new_tokens=512,
                 temperature=0.7,
                 return_full_text=False
@@ -466,7 +1725,7 @@ class HuggingFaceAPI:
             cleaned_questions = []
             for line in lines:
                 # Remove numbers and dots (e.g. "1. Question" -> "Question")
-                clean = re.sub(r'^\d+[\.\)\-]\s*', '', line)
+                clean = _NUM_PREFIX_RE.sub('', line)
                 if clean and len(clean) > 10: # Filter out short garbage
                     cleaned_questions.append(clean)
             
@@ -475,28 +1734,29 @@ class HuggingFaceAPI:
             if not final_list:
                  raise Exception("No questions generated")
 
-            logger.info(f"✓ [HF] Generated {len(final_list)} questions")
-            return "\n".join(final_list)
+            logger.info("✓ [HF] Generated %s questions", len(final_list))
+            result = "\n".join(final_list)
+            if settings.SEMANTIC_CACHE_ENABLED:
+                await cache.put(prompt, result, semantic_key=cache_key or None)
+            return result
         
         except Exception as e:
-            logger.error(f"[HF] Question generation error: {e}")
+            logger.error("[HF] Question generation error: %s", e)
             # Fallback if API fails
-            return "Tell me about yourself.\nWhat are your strengths?\nDescribe a challenge you faced.\nWhy do you want this job?\nAny questions for us?"
+            return _FALLBACK_QUESTIONS
     
     async def evaluate_response(self, question: str, response: str, job_description: str) -> dict:
         """Evaluate candidate response using LLM."""
         try:
-            logger.info(f"[HF] Evaluating response...")
+            logger.info("[HF] Evaluating response...")
             
             if len(response.strip()) < 5:
                 return {"score": 2, "marks": "2/10", "feedback": "Response too short."}
 
             prompt = f"<s>[INST] Evaluate this interview answer.\nRole: {job_description}\nQuestion: {question}\nAnswer: {response}\n\nOutput STRICTLY in this format:\nSCORE: [1-10]\nFEEDBACK: [One sentence feedback] [/INST]"
             
-            output = await asyncio.to_thread(
-                self.client.text_generation,
+            output = await self._text_generation(
                 prompt,
-                model=self.model,
                 max_new_tokens=150,
                 temperature=0.3
             )
@@ -506,11 +1766,11 @@ class HuggingFaceAPI:
             feedback = "Good attempt."
             
             # Robust parsing
-            score_match = re.search(r'SCORE:\s*(\d+)', text, re.IGNORECASE)
+            score_match = _SCORE_RE.search(text)
             if score_match:
-                score = int(score_match.group(1))
+                score = _clamp_score(int(score_match.group(1)))
                 
-            feedback_match = re.search(r'FEEDBACK:\s*(.*)', text, re.IGNORECASE)
+            feedback_match = _FEEDBACK_RE.search(text)
             if feedback_match:
                 feedback = feedback_match.group(1).strip()
             
@@ -521,5 +1781,103 @@ class HuggingFaceAPI:
             }
         
         except Exception as e:
-            logger.error(f"[HF] Evaluation error: {e}")
-            return {"score": 5, "marks": "5/10", "feedback": "Evaluation unavailable."}
\ No newline at end of file
+            logger.error("[HF] Evaluation error: %s", e)
+            return dict(_FALLBACK_EVALUATION)
+    
+    async def evaluate_responses(self, items: List[Tuple[str, str, str]]) -> List[dict]:
+        """
+        Evaluate many (question, response, job_description) triples with a single LLM call.
+        Results are in input order; entries the model drops or garbles get the neutral fallback.
+        """
+        results: List[Optional[dict]] = [
+            {"score": 2, "marks": "2/10", "feedback": "Response too short."} if len(response.strip()) < 5 else None
+            for _, response, _ in items
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        try:
+            logger.info("[HF] Evaluating %d responses in one call...", len(pending))
+            answers = "\n\n".join(
+                f"Answer {n}:\nRole: {items[i][2]}\nQuestion: {items[i][0]}\nAnswer: {items[i][1]}"
+                for n, i in enumerate(pending, 1)
+            )
+            output = await self._text_generation(
+                "<s>[INST] Evaluate these interview answers.\n\n" + answers + _BATCH_EVALUATION_SUFFIX,
+                max_new_tokens=60 * len(pending) + 50,
+                temperature=0.3
+            )
+            parsed = _first_json_list(output)
+        except Exception as e:
+            logger.error("[HF] Batch evaluation error: %s", e)
+            parsed = []
+        
+        for i, entry in zip(pending, parsed):
+            try:
+                score = _clamp_score(int(entry["score"]))
+                results[i] = {"score": score, "marks": f"{score}/10", "feedback": str(entry.get("feedback", "")).strip() or "Good attempt."}
+            except (TypeError, KeyError, ValueError):
+                pass
+        return [
+            result if result is not None else dict(_FALLBACK_EVALUATION)
+            for result in results
+        ]
+    
+    async def semantic_similarity(self, text1: str, text2: str) -> float:
+        """Cosine similarity of two texts using the local sentence encoder (no API call)."""
+        if not text1.strip() or not text2.strip():
+            return 0.0
+        v1, v2 = await asyncio.to_thread(lambda: (embed(text1), embed(text2)))
+        return float(v1 @ v2)
+    
+    async def semantic_similarity_batch(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Cosine similarity for many (text1, text2) pairs with a single batched encode."""
+        if not pairs:
+            return []
+        texts = [text for pair in pairs for text in pair]
+        vectors = await asyncio.to_thread(embed_batch, texts)
+        scores = np.einsum("ij,ij->i", vectors[0::2], vectors[1::2])
+        return [
+            float(score) if t1.strip() and t2.strip() else 0.0
+            for score, (t1, t2) in zip(scores, pairs)
+        ]
+    
+    async def evaluate_correctness(self, question: str, response: str, job_description: str) -> dict:
+        """Rate the technical correctness of a response as good / partial / poor."""
+        try:
+            logger.info("[HF] Checking correctness...")
+            
+            if len(response.strip()) < 5:
+                return {"assessment": "poor", "feedback": "Response too short."}
+
+            answer_text = "Question: " + question + "\nAnswer: " + response
+            prompt = _correctness_prefix(job_description) + answer_text + _CORRECTNESS_SUFFIX
+            # Answer embedded on its own - with the question folded in, the shared question
+            # text would dominate and carry a different (wrong) answer over the threshold
+            cache_key = (job_description, question, response)
+            
+            if settings.SEMANTIC_CACHE_ENABLED:
+                cached = await _correctness_cache.get(prompt, semantic_key=cache_key)
+                if cached:
+                    return orjson.loads(cached)
+            
+            output = await self._text_generation(
+                prompt,
+                max_new_tokens=150,
+                temperature=0.3
+            )
+            
+            # Single pass over the LLM output for both fields
+            match = _RATING_RE.search(output)
+            assessment = match.group(1).lower() if match else "partial"
+            feedback = match.group(2).strip() if match else "Reasonable answer."
+            
+            result = {"assessment": assessment, "feedback": feedback}
+            if settings.SEMANTIC_CACHE_ENABLED:
+                await _correctness_cache.put(prompt, orjson.dumps(result).decode(), semantic_key=cache_key)
+            return result
+        
+        except Exception as e:
+            logger.error("[HF] Correctness error: %s", e)
+            return dict(_FALLBACK_CORRECTNESS)
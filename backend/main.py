@@ -2,16 +2,25 @@
 
 from fastapi import FastAPI, WebSocket, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import StreamingResponse
 import asyncio
-import json
+import orjson
 from datetime import datetime
 import uuid
 import os
+import sys
 import logging
 
+try:
+    # libuv event loop - faster subprocess spawn and pipe I/O for the media integrations (no Windows build)
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from config import settings
+from integrations import close_semantic_caches
 from models import db_init
 from schemas import InterviewSetupRequest, InterviewSetupResponse
 from services import (
@@ -20,7 +29,7 @@ from services import (
     TimerService, ResultsService
 )
 
-# Setup logging
+# Setup logging (single place for the whole process - library modules only create loggers)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -29,12 +38,25 @@ app = FastAPI(title="AI Interview Portal", version="1.0.0")
 # ===== CORS Configuration =====
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.ALLOWED_ORIGINS,
+    allow_origins=list(settings.ALLOWED_ORIGINS),
+    allow_origin_regex=settings.ALLOWED_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# ===== Response Compression =====
+class MediaAwareGZipMiddleware(GZipMiddleware):
+    """GZip API/JSON responses; pass /media through untouched (already-compressed mp4/wav + range requests)"""
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/media"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Responses under 1KB skip compression entirely; WebSockets are never touched
+app.add_middleware(MediaAwareGZipMiddleware, minimum_size=1024)
+
 # Initialize services
 interview_service = InterviewService()
 audio_service = AudioService()
@@ -52,13 +74,14 @@ async def startup():
     db_init()
     print("✓ Database initialized")
     print("✓ Services ready")
+
+    # Load MuseTalk/Whisper models in the background so the first turn doesn't pay for it
+    app.state.warmup_task = asyncio.create_task(media_service.warm_up())
+    app.state.whisper_warmup_task = asyncio.create_task(audio_service.warm_up())
+    app.state.cache_prune_task = asyncio.create_task(media_service.prune_caches())
     
-    # Create media directories
-    os.makedirs(settings.MEDIA_DIR, exist_ok=True)
-    os.makedirs(settings.VIDEO_CACHE_DIR, exist_ok=True)
-    os.makedirs(settings.AUDIO_CACHE_DIR, exist_ok=True)
-    os.makedirs(settings.AVATAR_DIR, exist_ok=True)
-    print("✓ Media directories created")
+    # Media directories are created once, when settings load
+    print("✓ Media directories ready")
     print(f"  - Video: {settings.VIDEO_CACHE_DIR}")
     print(f"  - Audio: {settings.AUDIO_CACHE_DIR}")
     print(f"  - Avatars: {settings.AVATAR_DIR}")
@@ -74,6 +97,17 @@ async def startup():
         app.mount("/media", StaticFiles(directory=settings.MEDIA_DIR), name="media")
         print("✓ Static files mounted at /media")
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop long-lived inference processes and background loops"""
+    background = (app.state.warmup_task, app.state.whisper_warmup_task, app.state.cache_prune_task)
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await media_service.musetalk.close()
+    await audio_service.whisper.close()
+    await close_semantic_caches()
+
 # ===== REST ENDPOINTS =====
 
 @app.post("/api/interview/setup", response_model=InterviewSetupResponse)
@@ -85,11 +119,11 @@ async def setup_interview(request: InterviewSetupRequest):
     """
     session_id = str(uuid.uuid4())
     
-    print(f"\n[Setup] Starting interview setup...")
-    print(f"  Session ID: {session_id}")
-    print(f"  Candidate: {request.candidate_name}")
-    print(f"  Job: {request.job_description[:50]}...")
-    print(f"  Questions: {request.question_count}")
+    logger.info(
+        "[Setup] Starting interview setup: session=%s candidate=%s questions=%s",
+        session_id, request.candidate_name, request.question_count
+    )
+    logger.debug("[Setup] Job: %.50s...", request.job_description)
     
     # Create interview record
     interview_service.create_interview(
@@ -108,13 +142,12 @@ async def setup_interview(request: InterviewSetupRequest):
     )
     
     # Pre-generate greeting (async background task)
-    print(f"[Setup] Pre-generating greeting video...")
+    logger.info("[Setup] Pre-generating greeting video...")
     asyncio.create_task(media_service.pre_generate_greeting(session_id))
     
     # Return session info to frontend
     ws_url = f"ws://{settings.API_HOST}:8000/ws/interview/{session_id}"
-    print(f"[Setup] ✓ Interview setup complete")
-    print(f"  WebSocket URL: {ws_url}")
+    logger.info("[Setup] ✓ Interview setup complete (WebSocket: %s)", ws_url)
     
     return InterviewSetupResponse(
         session_id=session_id,
@@ -125,12 +158,18 @@ async def setup_interview(request: InterviewSetupRequest):
 @app.get("/api/health")
 async def health_check():
     """Check service health"""
+    musetalk, piper = await asyncio.gather(
+        media_service.musetalk.get_status(),
+        media_service.piper.get_status()
+    )
     return {
         "status": "ok",
         "services": {
             "database": "ok",
             "whisper": "ok",
-            "huggingface": "ok"
+            "huggingface": "ok",
+            "musetalk": musetalk,
+            "piper": piper
         }
     }
 
@@ -144,25 +183,32 @@ async def stream_video(session_id: str, video_name: str):
     """
     video_path = os.path.join(settings.VIDEO_CACHE_DIR, session_id, video_name)
     
-    print(f"[Stream] Request: {session_id}/{video_name}")
-    print(f"  Path: {video_path}")
+    logger.debug("[Stream] Request: %s/%s (%s)", session_id, video_name, video_path)
     
     # Security: Prevent path traversal
     if ".." in video_name or not video_path.startswith(settings.VIDEO_CACHE_DIR):
-        print(f"[Stream] ✗ Security check failed")
+        logger.warning("[Stream] ✗ Security check failed: %s", video_name)
         raise HTTPException(status_code=403, detail="Forbidden")
     
-    if not os.path.exists(video_path):
-        print(f"[Stream] ✗ File not found: {video_path}")
-        # List files in directory for debugging
-        session_dir = os.path.join(settings.VIDEO_CACHE_DIR, session_id)
-        if os.path.exists(session_dir):
-            files = os.listdir(session_dir)
-            print(f"[Stream] Files in {session_dir}: {files}")
+    try:
+        file_size = os.stat(video_path).st_size
+    except FileNotFoundError:
+        logger.warning("[Stream] ✗ File not found: %s", video_path)
+        # List files in directory for debugging (scandir: one listing, no per-entry stat)
+        if logger.isEnabledFor(logging.DEBUG):
+            session_dir = os.path.join(settings.VIDEO_CACHE_DIR, session_id)
+            try:
+                with os.scandir(session_dir) as it:
+                    entries = [
+                        "[{}] {}".format("DIR" if entry.is_dir() else "FILE", entry.name)
+                        for _, entry in zip(range(20), it)
+                    ]
+                logger.debug("[Stream] Files in %s: %s", session_dir, entries)
+            except FileNotFoundError:
+                pass
         raise HTTPException(status_code=404, detail="Video not found")
     
-    file_size = os.path.getsize(video_path)
-    print(f"[Stream] ✓ Streaming {video_name} ({file_size / (1024*1024):.2f} MB)")
+    logger.info("[Stream] ✓ Streaming %s (%.2f MB)", video_name, file_size / (1024*1024))
     
     # Support range requests for seeking
     async def file_streamer():
@@ -188,7 +234,7 @@ async def stream_video(session_id: str, video_name: str):
 @app.websocket("/ws/interview/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await websocket.accept()
-    print(f"\n[WS] Client connected: {session_id}")
+    logger.info("[WS] Client connected: %s", session_id)
     
     session = session_service.get_session(session_id)
     if not session:
@@ -197,6 +243,8 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     
     timer_service.start_timer(session_id, 30)
     
+    # Background renders for this connection - cancelled if it ends before they're used
+    opening_task = listening_task = media_task = None
     try:
         # 1. Ready Signal
         data = await websocket.receive_json()
@@ -207,25 +255,35 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         # We will use this loop whenever the candidate is speaking
         listening_video_url = f"/media/video/{session_id}/listening.mp4"
         if f"{session_id}_listening" not in media_service.video_cache:
-            print(f"[WS] Generating listening video loop...")
-            await media_service.generate_listening_video(session_id, 3.0, "listening")
+            logger.info("[WS] Generating listening video loop...")
+            listening_task = asyncio.create_task(media_service.generate_listening_video(session_id, 3.0, "listening"))
+
+        # The opening question doesn't depend on the greeting - write it and start its
+        # speech + video now, so they render while the greeting plays
+        async def prepare_opening():
+            text = await question_service.generate_opening_question(session.get("job_description", ""))
+            return text, media_service.prepare_turn(session_id, text, "q1")
+        opening_task = asyncio.create_task(prepare_opening())
 
         # 3. Send Greeting
         greeting_path = os.path.join(settings.VIDEO_CACHE_DIR, session_id, "greeting.mp4")
         greeting_url = f"/media/video/{session_id}/greeting.mp4"
         
-        print(f"[WS] Waiting for greeting video at: {greeting_path}")
+        logger.debug("[WS] Waiting for greeting video at: %s", greeting_path)
         
         # Poll for file existence (Timeout after 60 seconds)
         video_ready = False
         for _ in range(60):
-            if os.path.exists(greeting_path) and os.path.getsize(greeting_path) > 1000:
-                video_ready = True
-                break
+            try:
+                if os.stat(greeting_path).st_size > 1000:
+                    video_ready = True
+                    break
+            except FileNotFoundError:
+                pass
             await asyncio.sleep(1) # Wait 1 second and check again
             
         if not video_ready:
-            print(f"[WS] ✗ Timeout: Greeting video was not generated.")
+            logger.warning("[WS] ✗ Timeout: Greeting video was not generated.")
             # Fallback: Send just text if video fails
             await websocket.send_json({
                 "type": "greeting_video",
@@ -233,7 +291,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 "text": "Welcome to your AI Interview. (Video unavailable)"
             })
         else:
-            print(f"[WS] ✓ Greeting video ready. Sending to client.")
+            logger.info("[WS] ✓ Greeting video ready. Sending to client.")
             await websocket.send_json({
                 "type": "greeting_video",
                 "video_url": greeting_url,
@@ -253,15 +311,16 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         previous_evaluation = None
         
         while question_index <= max_questions:
-            print(f"\n[WS] === QUESTION {question_index} ===")
+            logger.info("[WS] === QUESTION %s ===", question_index)
             
             # --- STEP A: GENERATE QUESTION CONTENT ---
             question_text = ""
             spoken_text = "" # What the avatar actually says (Feedback + Question)
+            media_task = None
 
             if question_index == 1:
-                # First question (No feedback needed)
-                question_text = await question_service.generate_opening_question(session.get("job_description", ""))
+                # First question (No feedback needed) - already rendering since the greeting
+                question_text, media_task = await opening_task
                 spoken_text = question_text
             else:
                 # Adaptive Question (Includes Feedback from previous Q)
@@ -288,10 +347,16 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             session_service.add_question(session_id, question_index, question_text)
 
             # --- STEP B: GENERATE VIDEO (Feedback + Question) ---
-            print(f"[WS] Generating video for Question {question_index}...")
+            logger.info("[WS] Generating video for Question %s...", question_index)
             # We generate video for 'spoken_text' but display 'question_text' on screen
-            audio_path = await media_service.text_to_speech(spoken_text, session_id, f"q{question_index}")
-            await media_service.generate_video(session_id, audio_path, f"q{question_index}")
+            if media_task is None:
+                media_task = media_service.prepare_turn(session_id, spoken_text, f"q{question_index}")
+            if listening_task:
+                # Turn boundary: the listening loop must be ready before we switch to it below
+                await asyncio.gather(media_task, listening_task)
+                listening_task = None
+            else:
+                await media_task
 
             # --- STEP C: PLAY VIDEO ---
             await websocket.send_json({
@@ -311,7 +376,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
 
             # --- STEP D: LISTENING MODE ---
             # Tell frontend to switch to "Listening" video and start mic
-            print(f"[WS] Switching to listening mode...")
+            logger.debug("[WS] Switching to listening mode...")
             await websocket.send_json({
                 "type": "start_listening",
                 "video_url": listening_video_url # Loop this while user speaks
@@ -319,21 +384,35 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
 
             # --- STEP E: RECEIVE AUDIO ---
             audio_chunks = []
+            partial_tasks = set()
+
+            async def send_partial(chunk):
+                text = await audio_service.transcribe_chunk(session_id, chunk)
+                if text:
+                    await websocket.send_json({"type": "transcription_partial", "text": text})
+
             while True:
                 try:
                     msg = await asyncio.wait_for(websocket.receive(), timeout=60.0)
                     
                     if "text" in msg:
-                        data = json.loads(msg["text"])
+                        data = orjson.loads(msg["text"])
                         if data.get("type") == "audio_end": break
                     elif "bytes" in msg:
                         audio_chunks.append(msg["bytes"])
+                        # Live captions while the candidate talks - never blocks receiving
+                        task = asyncio.create_task(send_partial(msg["bytes"]))
+                        partial_tasks.add(task)
+                        task.add_done_callback(partial_tasks.discard)
                         
                 except asyncio.TimeoutError:
                     break
+            for task in partial_tasks:
+                task.cancel()
+            await asyncio.gather(*partial_tasks, return_exceptions=True)
             
             # --- STEP F: PROCESS RESPONSE ---
-            print(f"[WS] Processing response...")
+            logger.debug("[WS] Processing response...")
             final_transcript = await audio_service.get_final_transcription(session_id, audio_chunks)
             session_service.add_response(session_id, question_index, final_transcript)
             
@@ -371,18 +450,37 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         })
 
     except Exception as e:
-        logger.error(f"[WS] Error: {e}", exc_info=True)
+        logger.error("[WS] Error: %s", e, exc_info=True)
     finally:
+        leftovers = [opening_task, listening_task, media_task]
+        if opening_task is not None and opening_task.done() and not opening_task.cancelled() and opening_task.exception() is None:
+            # The first question's render lives inside the opening task's result
+            leftovers.append(opening_task.result()[1])
+        leftovers = [task for task in leftovers if task is not None and not task.done()]
+        for task in leftovers:
+            task.cancel()
+        await asyncio.gather(*leftovers, return_exceptions=True)
+        # A dropped connection mid-answer never reaches get_final_transcription
+        await audio_service.end_stream(session_id)
         await websocket.close()
 
 # ===== RUN =====
 
 if __name__ == "__main__":
     import uvicorn
+    if uvloop:
+        loop = "uvloop"
+    elif sys.platform == "win32":
+        # Keep Windows' default Proactor loop - uvicorn's asyncio setup installs the
+        # selector loop under reload, and that one can't spawn the media subprocesses
+        loop = "none"
+    else:
+        loop = "asyncio"
     uvicorn.run(
-        app,
+        "main:app",  # reload needs an import string
         host="0.0.0.0",
         port=8000,
         reload=True,
+        loop=loop,
         log_level="info"
     )
@@ -0,0 +1,94 @@
+"""
+Persistent MuseTalk inference worker.
+
+Launched once by MuseTalkAPI (cwd = MUSETALK_ROOT, same interpreter/env as
+the one-shot `python -m scripts.inference` call) and kept alive between
+turns. Each job re-runs scripts.inference in-process with the checkpoint
+loaders memoized, so torch import and UNet/VAE/Whisper/face-parsing loads
+happen on the first job only.
+
+Protocol (one JSON object per line):
+    stdin:  {"argv": ["--inference_config", "...", "--gpu", "0", ...]}
+    stdout: {"ok": true} | {"ok": false, "error": "..."}
+"""
+import functools
+import importlib
+import json
+import os
+import runpy
+import sys
+import traceback
+
+
+def _memoize(fn):
+    cache = {}
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = repr((args, sorted(kwargs.items())))
+        if key not in cache:
+            cache[key] = fn(*args, **kwargs)
+        return cache[key]
+    return wrapper
+
+
+def _patch_loaders():
+    """Memoize the loaders scripts.inference calls at the top of main()"""
+    try:
+        import musetalk.utils.utils as mt_utils
+        mt_utils.load_all_model = _memoize(mt_utils.load_all_model)
+    except Exception as e:
+        print(f"[Worker] load_all_model not memoized: {e}", file=sys.stderr)
+    try:
+        import musetalk.utils.face_parsing as face_parsing
+        face_parsing.FaceParsing = _memoize(face_parsing.FaceParsing)
+    except Exception as e:
+        print(f"[Worker] FaceParsing not memoized: {e}", file=sys.stderr)
+    try:
+        import musetalk.utils.audio_processor as audio_processor
+        audio_processor.AudioProcessor = _memoize(audio_processor.AudioProcessor)
+    except Exception as e:
+        print(f"[Worker] AudioProcessor not memoized: {e}", file=sys.stderr)
+    try:
+        import transformers
+        transformers.WhisperModel.from_pretrained = staticmethod(
+            _memoize(transformers.WhisperModel.from_pretrained)
+        )
+    except Exception as e:
+        print(f"[Worker] WhisperModel not memoized: {e}", file=sys.stderr)
+
+
+def main():
+    # Keep a private handle on the real stdout for the protocol, then point fd 1 at
+    # stderr so prints from inference (and the ffmpeg children it spawns) can't corrupt it
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    sys.path.insert(0, os.getcwd())
+    _patch_loaders()
+    try:
+        # Pay for torch/diffusers/mmpose imports now rather than on the first job
+        importlib.import_module("scripts.inference")
+    except Exception as e:
+        print(f"[Worker] Pre-import of scripts.inference failed: {e}", file=sys.stderr)
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+            sys.argv = ["scripts/inference.py", *job["argv"]]
+            runpy.run_module("scripts.inference", run_name="__main__")
+            result = {"ok": True}
+        except SystemExit as e:
+            result = {"ok": not e.code, "error": f"exit status {e.code}"}
+        except Exception as e:
+            traceback.print_exc()
+            result = {"ok": False, "error": repr(e)[-1000:]}
+        protocol.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
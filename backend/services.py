@@ -8,8 +8,8 @@ import uuid
 import os
 from config import settings
 import random
-from integrations import WhisperAPI, HuggingFaceAPI, PiperTTS, MuseTalkAPI, MuseVAPI
-from utils import logger, calculate_score, decide_next_question_type
+from integrations import WhisperAPI, HuggingFaceAPI, PiperTTS, MuseTalkAPI, MuseVAPI, prune_media_cache
+from utils import logger, calculate_score, decide_next_question_type, ensure_dir, forget_dir
 
 # ===== 1. INTERVIEW SERVICE =====
 
@@ -30,7 +30,7 @@ class InterviewService:
             "overall_score": None,
             "recommendation": None
         }
-        logger.info(f"[Interview] Created: {session_id}")
+        logger.info("[Interview] Created: %s", session_id)
         return self.interviews[session_id]
 
     def complete_interview(self, session_id, results):
@@ -40,14 +40,14 @@ class InterviewService:
             self.interviews[session_id]["end_time"] = datetime.now()
             self.interviews[session_id]["overall_score"] = results.get("overall_score")
             self.interviews[session_id]["recommendation"] = results.get("recommendation")
-            logger.info(f"[Interview] Completed: {session_id}")
+            logger.info("[Interview] Completed: %s", session_id)
 
     def end_interview(self, session_id):
         """Handle early termination"""
         if session_id in self.interviews:
             self.interviews[session_id]["status"] = "aborted"
             self.interviews[session_id]["end_time"] = datetime.now()
-            logger.info(f"[Interview] Aborted: {session_id}")
+            logger.info("[Interview] Aborted: %s", session_id)
 
 # ===== 2. AUDIO SERVICE =====
 
@@ -56,23 +56,32 @@ class AudioService:
         self.whisper = WhisperAPI()
         self.audio_buffer = {}
 
+    async def warm_up(self):
+        """Startup: load the speech model before the first answer arrives"""
+        await self.whisper.warm_up()
+
     async def transcribe_chunk(self, session_id, audio_bytes):
         """Stream audio chunk to Whisper, return partial transcription"""
         try:
-            result = await self.whisper.transcribe_streaming(audio_bytes)
+            result = await self.whisper.transcribe_streaming(session_id, audio_bytes)
             return result.get("partial_transcription", "")
         except Exception as e:
-            logger.error(f"[Audio] Transcription error: {e}")
+            logger.error("[Audio] Transcription error: %s", e)
             return ""
 
+    async def end_stream(self, session_id):
+        """Release live-transcription state (answer abandoned or connection lost)"""
+        await self.whisper.end_stream(session_id)
+
     async def get_final_transcription(self, session_id, audio_chunks):
         """Get final transcription from all chunks"""
+        await self.whisper.end_stream(session_id)
         try:
-            audio_combined = b"".join(audio_chunks)
-            result = await self.whisper.transcribe_full(audio_combined)
+            # Chunks are joined once and decoded in memory
+            result = await self.whisper.transcribe_full(audio_chunks)
             return result.get("full_transcription", "")
         except Exception as e:
-            logger.error(f"[Audio] Final transcription error: {e}")
+            logger.error("[Audio] Final transcription error: %s", e)
             return ""
 
 # ===== 3. EVALUATION SERVICE =====
@@ -84,8 +93,11 @@ class EvaluationService:
     async def evaluate_response(self, question, response, job_description, conversation_history):
         """Evaluate response on 3 dimensions"""
         try:
-            # Check relatedness
-            relatedness = await self.check_relatedness(question, response, job_description)
+            # Relatedness and correctness are independent LLM calls - overlap them
+            relatedness, correctness = await asyncio.gather(
+                self.check_relatedness(question, response, job_description),
+                self.assess_correctness(question, response, job_description)
+            )
             
             if relatedness < 0.3:
                 return {
@@ -98,9 +110,6 @@ class EvaluationService:
                     "feedback": "Response didn't address the question. Let's try another angle."
                 }
             
-            # Check correctness
-            correctness = await self.assess_correctness(question, response, job_description)
-            
             # Check depth
             depth = await self.assess_depth(question, response)
             
@@ -124,7 +133,7 @@ class EvaluationService:
             }
         
         except Exception as e:
-            logger.error(f"[Evaluation] Error: {e}")
+            logger.error("[Evaluation] Error: %s", e)
             return {
                 "score": 5,
                 "marks": "5/10",
@@ -165,6 +174,14 @@ class EvaluationService:
 
 # ===== 4. QUESTION SERVICE (FIXED) =====
 
+# Built once at import, not on every failed generation
+_FALLBACK_QUESTIONS = (
+    "Could you describe the most complex technical challenge you faced in your last project?",
+    "What specific tools or libraries did you prefer for that implementation, and why?",
+    "How did you handle error handling and edge cases in that scenario?",
+    "Can you walk me through the system architecture you designed for that?",
+)
+
 class QuestionService:
     def __init__(self):
         self.hf = HuggingFaceAPI()
@@ -178,10 +195,10 @@ class QuestionService:
             question_data = session_service.get_question(session_id, index)
             if question_data:
                 return question_data.get("text")
-            logger.warning(f"[Question] Question {index} not found for session {session_id}")
+            logger.warning("[Question] Question %s not found for session %s", index, session_id)
             return None
         except Exception as e:
-            logger.error(f"[Question] Error retrieving question {index}: {e}")
+            logger.error("[Question] Error retrieving question %s: %s", index, e)
             return None
 
     async def generate_opening_question(self, job_description):
@@ -193,7 +210,7 @@ Generate a friendly opening interview question about the candidate's background
 Keep it conversational and open-ended.
 Return ONLY the question, nothing else.
 """
-            question = await self.hf.generate(prompt)
+            question = await self.hf.generate(prompt, kind="opening", cache_key=(job_description,))
             return question.strip()
         except:
             return "Tell me about your professional background and relevant experience."
@@ -251,19 +268,16 @@ Return ONLY the question, nothing else.
                 - Return ONLY the question text.
                 """
             
-            question = await self.hf.generate(prompt)
+            # Cached questions are only reused for the same kind, job and previous question/answer
+            kind = next_type if next_type in ("new_topic", "follow_up_deeper") else "follow_up"
+            context = previous_question if kind == "new_topic" else response
+            question = await self.hf.generate(prompt, kind=kind, cache_key=(job_description, context))
             return question.strip()
 
         except Exception as e:
-            logger.error(f"[Question] Generation error: {e}")
+            logger.error("[Question] Generation error: %s", e)
             # [FALLBACK FIX] Randomized technical fallbacks
-            fallbacks = [
-                "Could you describe the most complex technical challenge you faced in your last project?",
-                "What specific tools or libraries did you prefer for that implementation, and why?",
-                "How did you handle error handling and edge cases in that scenario?",
-                "Can you walk me through the system architecture you designed for that?"
-            ]
-            return random.choice(fallbacks)
+            return random.choice(_FALLBACK_QUESTIONS)
 
     async def pre_generate_opening_questions(self, session_id, job_description, count):
         """Pre-generate opening questions"""
@@ -288,6 +302,7 @@ class MediaService:
         self.musetalk = MuseTalkAPI()
         self.musev = MuseVAPI() # [NEW] Initialize MuseV
         self.video_cache = {}
+        self._background = set() # strong refs so in-flight turn renders aren't garbage collected
         
         # Path to the shared 30s listening loop
         self.base_video_path = os.path.join(settings.AVATAR_DIR, settings.BASE_VIDEO_NAME)
@@ -303,7 +318,7 @@ class MediaService:
         avatar_image = os.path.join(settings.AVATAR_DIR, "default_avatar.png")
         
         if not os.path.exists(avatar_image):
-            logger.error(f"❌ Avatar image not found: {avatar_image}")
+            logger.error("❌ Avatar image not found: %s", avatar_image)
             return None
 
         # Generate the 30s video
@@ -319,6 +334,31 @@ class MediaService:
             
         return result
 
+    async def warm_up(self):
+        """Startup: get the base video and a warm MuseTalk worker ready before the first interview"""
+        if not self.musetalk.use_worker:
+            return
+        try:
+            input_source = await self.ensure_base_video()
+            if input_source:
+                await self.musetalk.warm_up(input_source)
+        except Exception as e:
+            logger.error("[Media] Warm-up error: %s", e)
+
+    async def prune_caches(self):
+        """Background loop: keep the shared audio/video caches under MEDIA_CACHE_MAX_MB"""
+        if settings.MEDIA_CACHE_MAX_MB <= 0:
+            return
+        max_bytes = settings.MEDIA_CACHE_MAX_MB * 1024 * 1024
+        while True:
+            try:
+                freed = await asyncio.to_thread(prune_media_cache, max_bytes)
+                if freed:
+                    logger.info("[Media] Pruned %.1f MB from media caches", freed / (1024 * 1024))
+            except Exception as e:
+                logger.error("[Media] Cache prune error: %s", e)
+            await asyncio.sleep(settings.MEDIA_CACHE_PRUNE_INTERVAL_S)
+
     async def generate_video(self, session_id, audio_path, video_filename):
         """
         Step 2: Generate Lip-Synced video using the Base Video + Audio.
@@ -329,11 +369,10 @@ class MediaService:
             if not input_source:
                 return None
             
-            output_dir = os.path.join(settings.VIDEO_CACHE_DIR, session_id)
-            os.makedirs(output_dir, exist_ok=True)
+            output_dir = ensure_dir(os.path.join(settings.VIDEO_CACHE_DIR, session_id))
             video_path = os.path.join(output_dir, f"{video_filename}.mp4")
             
-            logger.info(f"[Media] Generating {video_filename} using base: {os.path.basename(input_source)}")
+            logger.info("[Media] Generating %s using base: %s", video_filename, os.path.basename(input_source))
             
             # 2. Call MuseTalk with Video Input
             result = await self.musetalk.generate(
@@ -347,7 +386,7 @@ class MediaService:
                 return result
             return None
         except Exception as e:
-            logger.error(f"[Media] Error: {e}", exc_info=True)
+            logger.error("[Media] Error: %s", e, exc_info=True)
             return None
 
     async def generate_listening_video(self, session_id, audio_duration_seconds, video_filename):
@@ -360,6 +399,9 @@ class MediaService:
             base_video = await self.ensure_base_video()
             if not base_video: return None
             
+            # Session folder is owned here - integrations don't create directories per call
+            ensure_dir(os.path.join(settings.VIDEO_CACHE_DIR, session_id))
+            
             # If base is just an image (fallback), we can't use it as a video loop
             if base_video.endswith(".png"):
                 # Use old method: create generic listening video
@@ -377,13 +419,46 @@ class MediaService:
             
             return output_path
         except Exception as e:
-            logger.error(f"[Media] Listening setup error: {e}")
+            logger.error("[Media] Listening setup error: %s", e)
             return None
 
+    def prepare_turn(self, session_id, text, video_filename):
+        """
+        Start TTS + lip-sync for a turn without waiting on it.
+        Speech starts immediately; the returned task resolves to the video path once MuseTalk is done.
+        """
+        speech = self.piper.prepare_next(text)
+
+        async def render():
+            audio_path = await speech
+            if not audio_path:
+                return None
+            return await self.generate_video(session_id, audio_path, video_filename)
+
+        task = asyncio.create_task(render())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def render_batch(self, session_id, turns):
+        """
+        Render several (text, video_filename) turns as a pipeline: every line's speech is queued
+        on Piper at once, and each lip-sync starts as soon as its own audio is ready (MuseTalk
+        takes them in turn through its GPU slots). Returns the video paths in order.
+        """
+        tasks = [self.prepare_turn(session_id, text, video_filename) for text, video_filename in turns]
+        return list(await asyncio.gather(*tasks))
+
+    async def text_to_speech(self, text, session_id, audio_filename):
+        """Synthesize speech for a session clip; repeated lines come from the TTS cache"""
+        # No makedirs here - the cache link creates the session folder the first time it's missing
+        output_path = os.path.join(settings.AUDIO_CACHE_DIR, session_id, f"{audio_filename}.wav")
+        return await self.piper.synthesize(text, output_path)
+
     async def pre_generate_greeting(self, session_id):
         """Pre-generate greeting video before interview"""
         try:
-            logger.info(f"[Media] Pre-generating greeting for {session_id}")
+            logger.info("[Media] Pre-generating greeting for %s", session_id)
             
             text = "Hello! Welcome to your interview. I'm your AI interviewer. Let's begin by learning about your background and experience."
             
@@ -394,22 +469,22 @@ class MediaService:
                 # Generate video
                 video_path = await self.generate_video(session_id, audio_path, "greeting")
                 if video_path:
-                    logger.info(f"[Media] Greeting ready: {video_path}")
+                    logger.info("[Media] Greeting ready: %s", video_path)
                     return video_path
                 else:
-                    logger.error(f"✗ [Media] Greeting video failed")
+                    logger.error("✗ [Media] Greeting video failed")
             else:
-                logger.error(f"✗ [Media] Greeting audio generation failed")
+                logger.error("✗ [Media] Greeting audio generation failed")
                 return None
         
         except Exception as e:
-            logger.error(f"[Media] Greeting generation error: {e}", exc_info=True)
+            logger.error("[Media] Greeting generation error: %s", e, exc_info=True)
             return None
 
     async def generate_question_media(self, session_id, question_index, text):
         """Generate TTS and video for a question"""
         try:
-            logger.info(f"[Media] Generating question {question_index} media")
+            logger.info("[Media] Generating question %s media", question_index)
             
             # Generate audio
             audio_path = await self.text_to_speech(text, session_id, f"q{question_index}")
@@ -418,15 +493,15 @@ class MediaService:
                 # Generate video
                 await self.generate_video(session_id, audio_path, f"q{question_index}")
             else:
-                logger.error(f"✗ [Media] Question {question_index} audio generation failed")
+                logger.error("✗ [Media] Question %s audio generation failed", question_index)
         
         except Exception as e:
-            logger.error(f"[Media] Question generation error: {e}", exc_info=True)
+            logger.error("[Media] Question generation error: %s", e, exc_info=True)
 
     async def generate_closing_media(self, session_id):
         """Generate closing statement video"""
         try:
-            logger.info(f"[Media] Generating closing media")
+            logger.info("[Media] Generating closing media")
             
             text = "Thank you for your time today. We'll evaluate your responses and get back to you soon. Good luck!"
             
@@ -437,21 +512,23 @@ class MediaService:
                 # Generate video
                 await self.generate_video(session_id, audio_path, "closing")
             else:
-                logger.error(f"✗ [Media] Closing audio generation failed")
+                logger.error("✗ [Media] Closing audio generation failed")
         
         except Exception as e:
-            logger.error(f"[Media] Closing generation error: {e}", exc_info=True)
+            logger.error("[Media] Closing generation error: %s", e, exc_info=True)
 
     def cleanup_old_videos(self, session_id):
-        """Delete old videos to save space"""
-        try:
-            session_dir = os.path.join(settings.VIDEO_CACHE_DIR, session_id)
-            if os.path.exists(session_dir):
-                import shutil
-                shutil.rmtree(session_dir)
-                logger.info(f"[Media] Cleaned up videos for {session_id}")
-        except Exception as e:
-            logger.error(f"[Media] Cleanup error: {e}")
+        """Delete a session's video and audio folders (hardlinks into the shared caches) to save space"""
+        import shutil
+        for cache_dir in (settings.VIDEO_CACHE_DIR, settings.AUDIO_CACHE_DIR):
+            session_dir = os.path.join(cache_dir, session_id)
+            try:
+                if os.path.exists(session_dir):
+                    shutil.rmtree(session_dir)
+                    logger.info("[Media] Cleaned up %s for %s", session_dir, session_id)
+            except Exception as e:
+                logger.error("[Media] Cleanup error: %s", e)
+            forget_dir(session_dir)
 
 # ===== 6. SESSION SERVICE =====
 
@@ -471,7 +548,7 @@ class SessionService:
             "evaluations": [],
             "created_at": datetime.now()
         }
-        logger.info(f"[Session] Created: {session_id}")
+        logger.info("[Session] Created: %s", session_id)
         return self.sessions[session_id]
 
     def get_session(self, session_id):
@@ -486,7 +563,7 @@ class SessionService:
                 "text": text,
                 "created_at": datetime.now()
             })
-            logger.info(f"[Session] Added question {index}")
+            logger.info("[Session] Added question %s", index)
 
     def get_question(self, session_id, index):
         """Get question by index"""
@@ -506,7 +583,7 @@ class SessionService:
                 "text": text,
                 "created_at": datetime.now()
             })
-            logger.info(f"[Session] Added response to question {question_index}")
+            logger.info("[Session] Added response to question %s", question_index)
 
     def add_evaluation(self, session_id, question_index, evaluation):
         """Add evaluation"""
@@ -516,7 +593,7 @@ class SessionService:
                 **evaluation,
                 "created_at": datetime.now()
             })
-            logger.info(f"[Session] Added evaluation for question {question_index}")
+            logger.info("[Session] Added evaluation for question %s", question_index)
 
     def get_conversation_history(self, session_id):
         """Get full conversation history"""
@@ -543,7 +620,7 @@ class TimerService:
             "duration_seconds": duration_minutes * 60,
             "closing_buffer": settings.CLOSING_BUFFER_SECONDS
         }
-        logger.info(f"[Timer] Started for {session_id}: {duration_minutes} minutes")
+        logger.info("[Timer] Started for %s: %s minutes", session_id, duration_minutes)
 
     def get_remaining(self, session_id):
         """Get remaining time in seconds"""
@@ -568,7 +645,7 @@ class TimerService:
         """Stop and clean up timer"""
         if session_id in self.timers:
             del self.timers[session_id]
-            logger.info(f"[Timer] Stopped for {session_id}")
+            logger.info("[Timer] Stopped for %s", session_id)
 
 # ===== 8. RESULTS SERVICE =====
 
@@ -610,7 +687,7 @@ class ResultsService:
                 "feedback": e.get("feedback", "")
             })
         
-        logger.info(f"[Results] Compiled for {session_id}: {overall_score:.1f}/10 ({recommendation})")
+        logger.info("[Results] Compiled for %s: %.1f/10 (%s)", session_id, overall_score, recommendation)
         
         return {
             "overall_score": round(overall_score, 1),
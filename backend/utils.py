@@ -2,11 +2,14 @@
 # Helper Functions, Validators, Constants
 
 import logging
-from typing import Dict, Any
+import os
+import sys
+from typing import Dict, Any, Sequence, Union
+import numpy as np
 
 # ===== LOGGER =====
+# Handlers/levels are configured once by the entry point (main.py), not at import
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # ===== SCORING FUNCTIONS =====
 def calculate_score(relatedness: float, correctness: Dict, depth: Dict, confidence: float = 0.85) -> float:
@@ -46,20 +49,66 @@ def calculate_score(relatedness: float, correctness: Dict, depth: Dict, confiden
     
     return min(10.0, max(0.0, final_score))
 
-def decide_next_question_type(score: float, depth: str, correctness: str) -> str:
-    """Decide what type of question to ask next"""
-    
+# Label -> index codes and point lookup tables for batch scoring
+CORRECTNESS_CODES = {"good": 0, "partial": 1, "poor": 2}
+DEPTH_CODES = {"deep": 0, "medium": 1, "shallow": 2}
+_CORRECTNESS_POINTS = np.array([3.0, 1.5, 0.0], dtype=np.float32)
+_DEPTH_POINTS = np.array([2.0, 1.0, 0.0], dtype=np.float32)
+
+def _to_codes(labels: Union[np.ndarray, Sequence], codes: Dict[str, int]) -> np.ndarray:
+    """Accept int8 codes as-is, map string labels (unknown labels score 0 points)"""
+    arr = np.asarray(labels)
+    if arr.dtype.kind in "iu":
+        return arr
+    return np.array([codes.get(str(label).lower(), len(codes) - 1) for label in arr], dtype=np.int8)
+
+def calculate_scores_batch(
+    relatedness: np.ndarray,
+    correctness: Union[np.ndarray, Sequence],
+    depth: Union[np.ndarray, Sequence],
+    confidence: Union[np.ndarray, float] = 0.85
+) -> np.ndarray:
+    """
+    Vectorized calculate_score for N answers at once (e.g. post-interview rescoring).
+    correctness / depth are label sequences or int8 codes (see CORRECTNESS_CODES / DEPTH_CODES).
+    """
+    relatedness = np.asarray(relatedness, dtype=np.float32)
+    c_points = np.take(_CORRECTNESS_POINTS, _to_codes(correctness, CORRECTNESS_CODES))
+    d_points = np.take(_DEPTH_POINTS, _to_codes(depth, DEPTH_CODES))
+    total = (relatedness * 5 + c_points + d_points) * np.asarray(confidence, dtype=np.float32)
+    return np.clip(total, 0.0, 10.0)
+
+def _score_bucket(score: float) -> int:
+    """Bucket a score into the ranges decide_next_question_type branches on"""
     if score < 3:
+        return 0
+    elif score < 5:
+        return 1
+    elif score < 8:
+        return 2
+    return 3
+
+def _next_question_rule(bucket: int, depth: str) -> str:
+    if bucket == 0:
         return "repeat_easier"
-    elif score < 5 and depth == "shallow":
+    elif bucket == 1 and depth == "shallow":
         return "follow_up_deeper"
-    elif score < 5:
+    elif bucket == 1:
         return "follow_up_clarify"
-    elif score >= 8:
+    elif bucket == 3:
         return "new_topic"
     else:
         return "follow_up"
 
+def decide_next_question_type(score: float, depth: str, correctness: str) -> str:
+    """Decide what type of question to ask next"""
+    bucket = _score_bucket(score)
+    next_type = _NEXT_Q.get((bucket, depth, correctness))
+    if next_type is None:
+        # Unknown depth/correctness label from the LLM - fall back to the rule itself
+        next_type = _next_question_rule(bucket, depth)
+    return next_type
+
 # ===== CONSTANTS =====
 QUESTION_TYPES = {
     "opening": "Initial question about background",
@@ -81,6 +130,29 @@ CORRECTNESS_LEVELS = {
     "poor": "Incorrect or irrelevant"
 }
 
+# Precomputed (score_bucket, depth, correctness) -> next question type
+_NEXT_Q = {
+    (bucket, sys.intern(depth), sys.intern(correctness)): _next_question_rule(bucket, depth)
+    for bucket in range(4)
+    for depth in DEPTH_LEVELS
+    for correctness in CORRECTNESS_LEVELS
+}
+
+# ===== FILESYSTEM =====
+# Folders this process already created - repeat calls are a set lookup instead of a mkdir syscall
+_created_dirs = set()
+
+def ensure_dir(path: str) -> str:
+    """os.makedirs(path, exist_ok=True), once per path per process"""
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+    return path
+
+def forget_dir(path: str):
+    """Call after deleting a folder so the next ensure_dir() recreates it"""
+    _created_dirs.discard(path)
+
 # ===== VALIDATION =====
 def validate_job_description(text: str) -> bool:
     """Validate job description"""
@@ -405,6 +405,7 @@ export const InterviewPage: React.FC<{
             setAiVideoUrl(getFullVideoUrl(message.video_url));
             setCurrentQuestion(message.question_index);
             setQuestionText(message.question_text);
+            setTranscription('');
             setIsInputAllowed(false);
             if (isRecording) stopRecording();
           } 
@@ -416,6 +417,9 @@ export const InterviewPage: React.FC<{
             }
             setIsInputAllowed(true);
           }
+          else if (message.type === 'transcription_partial' || message.type === 'transcription') {
+            setTranscription(message.text);
+          }
           else if (message.type === 'results') {
              if (onComplete) onComplete(message);
           }
@@ -466,19 +470,20 @@ export const InterviewPage: React.FC<{
       mediaRecorder.ondataavailable = (event) => {
         if (event.data.size > 0) {
           audioChunksRef.current.push(event.data);
+          // Stream each chunk as it's recorded so the server can transcribe while we talk
+          if (socketRef.current?.readyState === WebSocket.OPEN) {
+            socketRef.current.send(event.data);
+          }
         }
       };
 
       mediaRecorder.onstop = async () => {
-        // Create blob from collected chunks
-        const audioBlob = new Blob(audioChunksRef.current, { type: 'audio/wav' });
-        
-        console.log(`[Interview] Sending audio: ${audioBlob.size} bytes`); // Debug log
+        const totalBytes = audioChunksRef.current.reduce((sum, chunk) => sum + chunk.size, 0);
+        console.log(`[Interview] Sent audio: ${totalBytes} bytes`); // Debug log
         
         if (socketRef.current?.readyState === WebSocket.OPEN) {
-          // Send the Blob directly
-          socketRef.current.send(audioBlob);
-          // Send the 'audio_end' signal strictly AFTER the blob
+          // The final chunk is delivered by ondataavailable just before onstop;
+          // send the 'audio_end' signal strictly AFTER it
           setTimeout(() => {
              socketRef.current?.send(JSON.stringify({ type: 'audio_end' }));
           }, 100);